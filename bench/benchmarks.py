@@ -0,0 +1,194 @@
+"""Benchmarks for the solver. Run from the repository root, e.g.
+
+    python bench/benchmarks.py streaming --solutions 2000
+    python bench/benchmarks.py single-pass --runs 3 --timeout 10
+    python bench/benchmarks.py engines --nodes 10000
+    python bench/benchmarks.py subsets --subsets 20000
+    python bench/benchmarks.py subset-order --subsets 10 --nodes 100000
+"""
+import sys
+from argparse import ArgumentParser
+from itertools import islice
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+
+SRC = Path(__file__).parent.parent / 'src'
+
+sys.path.append(str(SRC))
+
+from dlx_solver import DlxSolver, SearchLimitReached
+from kata_part_3_solution import Problem, piece_subsets, solve
+from pads import PadsDublin as Pads
+from shapes import Shapes
+from time_guard import WorkerPool, time_guard
+
+ALL_PIECES = [(pad, i) for pad in Pads for i in range(1, 7)]
+
+
+def streaming(shape: Shapes, num_solutions: int, block: int) -> None:
+    """Enumerates solutions and reports the mean search and decoding cost per solution for every block of
+    solutions. Both should stay flat however many solutions have been produced already."""
+    print(f"{shape.name}: {num_solutions} solutions in blocks of {block}")
+    print(f"{'solutions':>10} {'search us':>10} {'decode us':>10}")
+    n, search_time, decode_time = 0, 0.0, 0.0
+    problem = Problem(shape.value, ALL_PIECES, [], [])
+    for subset in piece_subsets(shape.value, ALL_PIECES):
+        solver = problem.solver(subset)
+        while n < num_solutions:
+            start = perf_counter()
+            solution = next(solver, None)
+            search_time += perf_counter() - start
+            if solution is None:
+                break
+            start = perf_counter()
+            problem.decode(solution)
+            decode_time += perf_counter() - start
+            n += 1
+            if n % block == 0:
+                print(f"{n:>10} {search_time / block * 1e6:>10.1f} {decode_time / block * 1e6:>10.1f}")
+                search_time, decode_time = 0.0, 0.0
+        if n == num_solutions:
+            break
+
+
+def _time_to_first_solution(shape: Shapes, single_pass: bool) -> float:
+    start = perf_counter()
+    next(solve(shape.value, ALL_PIECES, single_pass=single_pass))
+    return perf_counter() - start
+
+
+def single_pass(shapes: list[Shapes], runs: int, timeout: int) -> None:
+    """Compares the time to the first solution of one search per piece subset with that of the single-pass search
+    over all the pieces, for every shape. Each run reshuffles the pieces; runs over `timeout` seconds count as
+    timeouts."""
+    print(f"median seconds to the first solution over {runs} runs, timeouts in brackets")
+    print(f"{'shape':<42} {'subsets':>12} {'single pass':>12}")
+    with WorkerPool() as pool:
+        time_to_first_solution = time_guard(timeout, pool)(_time_to_first_solution)
+        for shape in shapes:
+            cells = []
+            for mode in (False, True):
+                times, timeouts = [], 0
+                for _ in range(runs):
+                    try:
+                        times.append(time_to_first_solution(shape, mode))
+                    except TimeoutError:
+                        timeouts += 1
+                cell = f"{median(times):.2f}" if times else "-"
+                cells.append(f"{cell} [{timeouts}]" if timeouts else cell)
+            print(f"{shape.name:<42} {cells[0]:>12} {cells[1]:>12}")
+
+
+def engines(shapes: list[Shapes], nodes: int, engine_names: list[str]) -> None:
+    """Measures the search speed of the DlxSolver engines in rows selected per second, on the matrix of the first
+    piece subset and on the single-pass matrix of every shape, along with the time to build each solver."""
+    print(f"thousands of rows selected per second over the first {nodes} (build time in ms)")
+    print(f"{'shape':<42} {'mode':<7} {'columns':>7} {'rows':>6}", *(f"{name:>16}" for name in engine_names))
+    for shape in shapes:
+        for mode in ('subsets', 'single'):
+            problem = Problem(shape.value, ALL_PIECES, [], [], single_pass=mode == 'single')
+            columns, rows, clues = problem.matrix()
+            excluded_columns = []
+            if mode == 'subsets':
+                excluded_columns = problem.excluded_columns(next(piece_subsets(shape.value, ALL_PIECES)))
+            cells = []
+            for name in engine_names:
+                start = perf_counter()
+                solver = DlxSolver(
+                    columns,
+                    rows,
+                    clues,
+                    engine=name,
+                    sparse=True,
+                    excluded_columns=excluded_columns,
+                )
+                build_time = perf_counter() - start
+                start = perf_counter()
+                try:
+                    for _ in solver.limit(nodes):
+                        pass
+                except SearchLimitReached:
+                    pass
+                search_time = perf_counter() - start
+                cells.append(f"{nodes / search_time / 1000:.1f} ({build_time * 1000:.0f})")
+            print(f"{shape.name:<42} {mode:<7} {len(columns):>7} {len(rows):>6}", *(f"{c:>16}" for c in cells))
+
+
+def subsets(shapes: list[Shapes], num_subsets: int) -> None:
+    """Reports how many of the piece subsets with the right numbers of cubits filter_pieces rejects for their
+    sides, over the first `num_subsets` it passes for every shape, and how long that takes."""
+    print(f"piece subsets over the first {num_subsets} passed")
+    print(f"{'shape':<42} {'passed':>8} {'rejected':>9} {'%':>6} {'seconds':>8}")
+    for shape in shapes:
+        stats = {}
+        start = perf_counter()
+        for n, _ in enumerate(piece_subsets(shape.value, ALL_PIECES, stats=stats), 1):
+            if n == num_subsets:
+                break
+        elapsed = perf_counter() - start
+        share = 100 * stats['rejected'] / (stats['rejected'] + stats['passed'])
+        print(f"{shape.name:<42} {stats['passed']:>8} {stats['rejected']:>9} {share:>6.1f} {elapsed:>8.2f}")
+
+
+def subset_order(shapes: list[Shapes], num_subsets: int, nodes: int) -> None:
+    """Shows, for the first `num_subsets` piece subsets of every shape in the order solve() takes them, the number
+    of rows the search would try first (DlxSolver.branching) and the rows it selects before the first solution, or
+    before it finds there is none, up to `nodes`; a score for ordering the subsets would have to predict the latter."""
+    print(f"per subset: rows tried first / rows selected to the first solution (+), to none (-) or over {nodes} (>)")
+    for shape in shapes:
+        problem = Problem(shape.value, ALL_PIECES, [], [])
+        cells = []
+        for subset in islice(piece_subsets(shape.value, ALL_PIECES), num_subsets):
+            solver = problem.solver(subset)
+            branching = solver.branching()
+            start = solver.nodes
+            try:
+                outcome = '-' if next(solver.limit(nodes), None) is None else '+'
+            except SearchLimitReached:
+                outcome = '>'
+            cells.append(f"{branching}/{solver.nodes - start}{outcome}")
+        print(f"{shape.name:<42}", *cells)
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    streaming_parser = commands.add_parser('streaming', help=streaming.__doc__.splitlines()[0])
+    streaming_parser.add_argument('--shape', default=Shapes.CUBE_1x1x1.name, choices=[s.name for s in Shapes])
+    streaming_parser.add_argument('--solutions', type=int, default=5000)
+    streaming_parser.add_argument('--block', type=int, default=500)
+    single_pass_parser = commands.add_parser('single-pass', help=single_pass.__doc__.splitlines()[0])
+    single_pass_parser.add_argument('--shape', action='append', choices=[s.name for s in Shapes])
+    single_pass_parser.add_argument('--runs', type=int, default=3)
+    single_pass_parser.add_argument('--timeout', type=int, default=10)
+    engines_parser = commands.add_parser('engines', help=engines.__doc__.splitlines()[0])
+    engines_parser.add_argument('--shape', action='append', choices=[s.name for s in Shapes])
+    engines_parser.add_argument('--nodes', type=int, default=10000)
+    engines_parser.add_argument('--engine', action='append', choices=['array', 'nodes', 'bitset'])
+    subsets_parser = commands.add_parser('subsets', help=subsets.__doc__.splitlines()[0])
+    subsets_parser.add_argument('--shape', action='append', choices=[s.name for s in Shapes])
+    subsets_parser.add_argument('--subsets', type=int, default=20000)
+    subset_order_parser = commands.add_parser('subset-order', help=subset_order.__doc__.splitlines()[0])
+    subset_order_parser.add_argument('--shape', action='append', choices=[s.name for s in Shapes])
+    subset_order_parser.add_argument('--subsets', type=int, default=10)
+    subset_order_parser.add_argument('--nodes', type=int, default=100000)
+    args = parser.parse_args()
+    if args.command == 'streaming':
+        streaming(Shapes[args.shape], args.solutions, args.block)
+    elif args.command == 'single-pass':
+        shapes = [Shapes[name] for name in args.shape] if args.shape else list(Shapes)
+        single_pass(shapes, args.runs, args.timeout)
+    elif args.command == 'engines':
+        shapes = [Shapes[name] for name in args.shape] if args.shape else list(Shapes)
+        engines(shapes, args.nodes, args.engine or ['array', 'bitset'])
+    elif args.command == 'subsets':
+        shapes = [Shapes[name] for name in args.shape] if args.shape else list(Shapes)
+        subsets(shapes, args.subsets)
+    elif args.command == 'subset-order':
+        shapes = [Shapes[name] for name in args.shape] if args.shape else list(Shapes)
+        subset_order(shapes, args.subsets, args.nodes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""Shapes compiled into the slot tables that the solvers and the solution check need.
+
+Position p = 16 * tile + i is position i of the edge on the tile, counted as in PadsBase.__getitem__. Positions
+that share a slot, because the tiles meet there or a tack stitch joins them, must be covered by exactly one cubit.
+A shape is compiled once per shape and tack stitches and kept in a cache shared by all the parts.
+"""
+from array import array
+from collections import Counter
+from collections.abc import Iterator, Sequence
+from functools import lru_cache
+from typing import NamedTuple
+
+try:
+    import numpy as np
+except ImportError:  # only slot_partition needs it
+    np = None
+
+CACHE_SIZE = 256  # compiled shapes kept, the least recently used dropped first
+TEMPLATE_CACHE_SIZE = 1 << 16  # row templates kept, likewise
+
+
+class CompiledShape(NamedTuple):
+    num_tiles: int
+    slots: tuple[int, ...]  # position p is in the slot named after position slots[p], as get_shape_slots has it
+    dense_slots: tuple[int, ...]  # position p is in slot dense_slots[p], numbered from 0 by first position
+    num_slots: int
+    corner_slots: frozenset[int]  # the dense slots that hold corners
+    tile_slots: tuple[tuple[int, ...], ...]  # tile_slots[tile][i] is dense_slots[16 * tile + i]
+    sides_paired: bool  # whether every slot between the corners is shared by two positions, no more
+
+    def row_template(self, tile: int, mask: int) -> tuple[int, ...]:
+        """Returns the dense slots, in order, that an edge given as a 16-bit mask as in edge_tables covers on the
+        tile: the slot columns of the rows that place a piece there. Each is computed once per slots of a tile and
+        mask, in a cache shared by all the compiled shapes."""
+        return _row_template(self.tile_slots[tile], mask)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _row_template(slots: tuple[int, ...], mask: int) -> tuple[int, ...]:
+    return tuple(sorted({slots[i] for i in range(16) if mask >> i & 1}))
+
+
+def _slot_pairs(
+    tiles: Sequence[Sequence[int]],
+    tack_stitches: Sequence[tuple[int, int]],
+) -> Iterator[tuple[int, int]]:
+    """Yields the pairs of positions that share a slot, the places where tiles meet first, from one side to the
+    other, then the tack stitches."""
+    for tile1, neighbors in enumerate(tiles):
+        for edge1, tile2 in enumerate(neighbors):
+            if tile2 > tile1:
+                edge2 = next(i for i, v in enumerate(tiles[tile2]) if v == tile1)
+                for i in range(5):
+                    yield 16 * tile1 + (4 * edge1 + i) % 16, 16 * tile2 + (4 * edge2 + 4 - i) % 16
+    yield from tack_stitches
+
+
+def _slot_roots(
+    tiles: Sequence[Sequence[int]],
+    tack_stitches: Sequence[tuple[int, int]],
+) -> list[int]:
+    """Returns the root position of the slot of every position. The slots are joined by size, the larger keeping
+    its root, with path halving, but each slot is named as if the slot of the second position of every pair had
+    always been kept, which is how the names have always been chosen."""
+    num_positions = 16 * len(tiles)
+    parents = array('i', range(num_positions))
+    sizes = array('i', [1]) * num_positions
+    names = array('i', range(num_positions))  # the name of the slot whose root is at each position
+
+    def find(i: int) -> int:
+        while parents[i] != i:
+            parents[i] = i = parents[parents[i]]
+        return i
+
+    for i, j in _slot_pairs(tiles, tack_stitches):
+        i, j = find(i), find(j)
+        if i != j:
+            name = names[j]
+            if sizes[i] < sizes[j]:
+                i, j = j, i
+            parents[j] = i
+            sizes[i] += sizes[j]
+            names[i] = name
+
+    return [names[find(i)] for i in range(num_positions)]
+
+
+def slot_partition(
+    tiles: Sequence[Sequence[int]],
+    tack_stitches: Sequence[Sequence[int]] | None = None,
+) -> Sequence[int]:
+    """Returns the same slot numbers as compile_shape(tiles, tack_stitches).dense_slots, computed from the table of
+    neighbors in bulk with NumPy, as an array, for shapes too large to compile position by position. Without
+    NumPy it returns dense_slots."""
+    if np is None:
+        return compile_shape(tiles, tack_stitches).dense_slots
+    table = np.asarray(tiles, dtype=np.int64).reshape(-1, 4)
+    tile1, edge1 = np.nonzero(table > np.arange(len(table))[:, None])
+    tile2 = table[tile1, edge1]
+    edge2 = np.argmax(table[tile2] == tile1[:, None], axis=1)
+    offsets = np.arange(5)
+    first = (16 * tile1[:, None] + (4 * edge1[:, None] + offsets) % 16).ravel()
+    second = (16 * tile2[:, None] + (4 * edge2[:, None] + 4 - offsets) % 16).ravel()
+    if tack_stitches:
+        stitches = np.asarray(tack_stitches, dtype=np.int64).reshape(-1, 2)
+        first, second = np.concatenate([first, stitches[:, 0]]), np.concatenate([second, stitches[:, 1]])
+    # Every position points to a smaller one in its slot, or to itself; hooking the larger of the roots of each pair
+    # onto the smaller and pointer jumping until no pair is split leaves every position at the first of its slot.
+    labels = np.arange(16 * len(table))
+    while True:
+        while not np.array_equal(jumped := labels[labels], labels):
+            labels = jumped
+        roots1, roots2 = labels[first], labels[second]
+        split = roots1 != roots2
+        if not split.any():
+            break
+        np.minimum.at(labels, np.maximum(roots1, roots2)[split], np.minimum(roots1, roots2)[split])
+    return np.unique(labels, return_inverse=True)[1]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _compile(tiles: tuple[tuple[int, ...], ...], tack_stitches: tuple[tuple[int, int], ...]) -> CompiledShape:
+    slots = _slot_roots(tiles, tack_stitches)
+    numbers: dict[int, int] = {}
+    dense_slots = tuple(numbers.setdefault(root, len(numbers)) for root in slots)
+    multiplicities = Counter(dense_slots)
+    return CompiledShape(
+        num_tiles=len(tiles),
+        slots=tuple(slots),
+        dense_slots=dense_slots,
+        num_slots=len(numbers),
+        corner_slots=frozenset(dense_slots[p] for p in range(0, len(slots), 4)),
+        tile_slots=tuple(dense_slots[p:p + 16] for p in range(0, len(slots), 16)),
+        sides_paired=all(multiplicities[slot] == 2 for p, slot in enumerate(dense_slots) if p % 4),
+    )
+
+
+def compile_shape(
+    tiles: Sequence[Sequence[int]],
+    tack_stitches: Sequence[Sequence[int]] | None = None,
+) -> CompiledShape:
+    """Returns the shape compiled, from the cache if it was compiled before with the same tack stitches."""
+    return _compile(tuple(map(tuple, tiles)), tuple(map(tuple, tack_stitches or ())))
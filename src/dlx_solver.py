@@ -1,5 +1,18 @@
 # GENERAL EXACT COVER SOLVER
-from collections.abc import Iterable
+from bisect import bisect_right
+from collections.abc import Iterable, Iterator, Sequence, Sized
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from copy import deepcopy
+from inspect import signature
+from itertools import islice
+from sys import maxsize
+from time import monotonic
+from typing import Protocol
+
+try:
+    import rust_dlx_lib
+except ImportError:  # only the 'rust' engine needs it
+    rust_dlx_lib = None
 
 
 class Node(object):
@@ -43,13 +56,298 @@ class Head(Node):
 Solution = list[int]  # a list of the indices of the selected rows
 
 
+class RowConstraint(Protocol):
+    """A side constraint on the rows of a solution, checked as the search goes.
+
+    `push` is called with the index of every row that is selected, clues included, and returns False if no
+    solution can contain the rows selected so far, which makes the search backtrack at once. `pop` is called with
+    the same index when the row is deselected again, whatever `push` returned, so that the constraint can keep
+    incremental state.
+    """
+
+    def push(self, row_idx: int) -> bool: ...
+
+    def pop(self, row_idx: int) -> None: ...
+
+
+class SearchLimitReached(TimeoutError):
+    """Raised by a search that has used up the rows or the time given to DlxSolver.limit."""
+
+
+# How many rows a search with a deadline selects between two looks at the clock.
+_CLOCK_INTERVAL = 256
+
+
+def _row_columns(row: Iterable[int], sparse: bool) -> Iterable[int]:
+    """Returns the indices of the columns covered by a row given either densely or sparsely, as Python ints even if
+    the row is a NumPy or array slice."""
+    return map(int, row) if sparse else (i for i, v in enumerate(row) if v)
+
+
 class DlxSolver(Iterable[Solution]):
+    """Iterates over the solutions of an exact cover problem.
+
+    `columns` flags each column as primary (must be covered exactly once) or secondary (may be covered at most
+    once), `rows` are 0/1 lists over those columns, or, if `sparse` is set, sorted lists of the indices of the
+    columns that each row covers, and `clues` are indices of rows that must be part of every solution. The columns
+    listed in `excluded_columns` are covered before the search starts, which disables every row that covers one
+    of them. `constraint` prunes the search beyond what the columns express; see RowConstraint. `restart` starts a
+    new search over the same matrix with other clues and excluded columns, and `limit` bounds a search. `engine`
+    selects the implementation: 'array' keeps the links in flat integer arrays, 'nodes' builds a graph of Node
+    objects, 'bitset' keeps sets of rows in Python ints, and 'auto' (default) picks 'bitset' or 'array' by the
+    size of the matrix. 'rust' hands plain searches to the rust_dlx_lib wheel; see RustDlxSolver.
+    """
+
+    def __new__(cls, *args, **kwargs):
+        if cls is DlxSolver:
+            arguments = _ENGINE_SIGNATURE.bind(None, *args, **kwargs).arguments
+            engine = arguments.get('engine', 'auto')
+            if engine == 'auto':
+                engine = _auto_engine(arguments['columns'], arguments['rows'])
+            try:
+                cls = _ENGINES[engine]
+            except KeyError:
+                raise ValueError(f"Unknown engine {engine!r}; expected one of {sorted(_ENGINES)}") from None
+        return super().__new__(cls)
 
-    def __init__(self, columns: Iterable[bool], rows: Iterable[Iterable[int]], clues: Iterable[int] | None = None):
+    @classmethod
+    def from_csr(
+        cls,
+        columns: Iterable[bool],
+        indptr: Sequence[int],
+        indices: Sequence[int],
+        clues: Iterable[int] | None = None,
+        engine: str = 'auto',
+        constraint: RowConstraint | None = None,
+    ) -> 'DlxSolver':
+        """Creates a solver from a matrix in compressed sparse row form: the columns covered by row i are
+        indices[indptr[i]:indptr[i + 1]]."""
+        rows = [indices[indptr[i]: indptr[i + 1]] for i in range(len(indptr) - 1)]
+        columns = list(columns)
+        return cls(columns, rows, clues, engine=engine, sparse=True, constraint=constraint)
+
+    def __init__(
+        self,
+        clues: Iterable[int] | None = None,
+        excluded_columns: Iterable[int] = (),
+        constraint: RowConstraint | None = None,
+    ):
         super().__init__()
-        if clues is None:
-            clues = []
-        self._clues = clues
+        self._clues = [] if clues is None else clues
+        self._excluded_columns = excluded_columns
+        self._constraint = constraint
+        self._excluded: list = []  # the covered column heads of the excluded columns
+        # The search state: the selected row nodes, clues first, and whether the next step is to backtrack. Keeping
+        # it on the solver rather than in nested generator frames lets the search pause after every solution and
+        # resume where it left off on the next call to __next__, at any depth.
+        self._solution: list | None = None
+        self._num_clues = 0
+        self._backtracking = False
+        self._max_depth: int | None = None
+        self._depth_limit = -1
+        self._level_counts: list[int] | None = None
+        self.nodes = 0  # rows selected by all the searches so far, clues excluded
+        self._node_limit: int | None = None
+        self._deadline: float | None = None
+
+    def _start(self) -> None:
+        self._solution = []
+        excluded = {}
+        for index in self._excluded_columns:
+            column = self._column(index)
+            if column not in excluded:
+                excluded[column] = index
+                self._cover(column)
+                self._excluded.append(column)
+        clue_by_column = {}
+        for row_idx in self._clues:
+            node = self._clue_node(row_idx)
+            columns = self._columns_in_row(node)
+            index = next((excluded[c] for c in columns if c in excluded), None)
+            if index is not None:
+                raise ValueError(f"Clue {row_idx} covers excluded column {index}")
+            other = next((clue_by_column[c] for c in columns if c in clue_by_column), None)
+            if other is not None:
+                raise ValueError(f"Clue {row_idx} conflicts with clue {other}")
+            clue_by_column.update((c, row_idx) for c in columns)
+            self._cover(self._column_of(node))
+            self._solution.append(node)
+            self._select(node)
+            if self._constraint is not None and not self._constraint.push(row_idx):
+                # No solution at all; the first step backtracks past the clues
+                self._backtracking = True
+        self._num_clues = len(self._solution)
+        if self._max_depth is not None:
+            self._depth_limit = self._num_clues + self._max_depth
+
+    def restart(self, clues: Iterable[int] | None = None, excluded_columns: Iterable[int] = ()) -> None:
+        """Abandons the current search and starts a new one over the same matrix. Only the links touched by the
+        current search are restored, which is much cheaper than building a new solver."""
+        if self._solution is not None:
+            for node in reversed(self._solution):
+                if self._constraint is not None:
+                    self._constraint.pop(self._row_index(node))
+                self._deselect(node)
+                self._uncover(self._column_of(node))
+            for column in reversed(self._excluded):
+                self._uncover(column)
+        self._clues = [] if clues is None else clues
+        self._excluded_columns = excluded_columns
+        self._excluded = []
+        self._solution = None
+        self._num_clues = 0
+        self._backtracking = False
+        self._max_depth = None
+        self._depth_limit = -1
+        self._node_limit = None
+        self._deadline = None
+
+    def limit(self, nodes: int | None = None, deadline: float | None = None) -> 'DlxSolver':
+        """Makes the search raise SearchLimitReached once it has selected `nodes` more rows, or once
+        time.monotonic() has passed `deadline`. The search stops between two steps, so it can go on from there
+        after another call to limit; restart() lifts the limits."""
+        self._node_limit = None if nodes is None else self.nodes + nodes
+        self._deadline = deadline
+        return self
+
+    def _next_check(self, nodes: int) -> int:
+        """Returns the number of rows selected at which _advance is to call _check_limits next."""
+        check = maxsize if self._node_limit is None else self._node_limit
+        if self._deadline is not None:
+            check = min(check, nodes + _CLOCK_INTERVAL)
+        return check
+
+    def _check_limits(self) -> None:
+        if self._node_limit is not None and self.nodes >= self._node_limit:
+            raise SearchLimitReached(f"Search stopped after {self.nodes} rows")
+        if self._deadline is not None and monotonic() >= self._deadline:
+            raise SearchLimitReached("Search stopped at its deadline")
+
+    def _clue_node(self, row_idx: int):
+        """Returns the first node in the row with index `row_idx`."""
+        if not 0 <= row_idx < len(self._row_nodes):
+            raise IndexError(f"Clue {row_idx} is not a row index")
+        node = self._row_nodes[row_idx]
+        if node is None:
+            raise ValueError(f"Clue {row_idx} is an empty row")
+        return node
+
+    def _advance(self) -> bool:
+        """Runs the search up to the next solution and returns True, or to its end and returns False."""
+        if self._solution is None:
+            self._start()
+        solution, num_clues, depth_limit = self._solution, self._num_clues, self._depth_limit
+        level_counts, constraint, row_index = self._level_counts, self._constraint, self._row_index
+        cover, uncover = self._cover, self._uncover
+        select, deselect = self._select, self._deselect
+        choose_column, next_in_column, column_of = self._choose_column, self._next_in_column, self._column_of
+        backtracking = self._backtracking
+        nodes = self.nodes
+        check = nodes if self._deadline is not None else self._next_check(nodes)
+        while True:
+            if nodes >= check:
+                # Between two steps, the links, the selected rows and the flag are all the state there is.
+                self.nodes, self._backtracking = nodes, backtracking
+                self._check_limits()
+                check = self._next_check(nodes)
+            if backtracking:
+                if len(solution) == num_clues:
+                    self.nodes = nodes
+                    self._backtracking = True
+                    return False
+                node = solution.pop()
+                if constraint is not None:
+                    constraint.pop(row_index(node))
+                deselect(node)
+                column = column_of(node)
+                node = next_in_column(node)
+                if node == column:
+                    # All rows in column tried
+                    uncover(column)
+                    continue
+                backtracking = False
+            else:
+                column, size = choose_column()
+                if column is None:
+                    # No more columns to cover; problem solved
+                    self.nodes = nodes
+                    self._backtracking = True
+                    return True
+                if size == 0:
+                    # No rows left to cover column; solution not found
+                    backtracking = True
+                    continue
+                if len(solution) == depth_limit:
+                    # Deep enough; see prefixes()
+                    self.nodes = nodes
+                    self._backtracking = True
+                    return True
+                cover(column)
+                node = next_in_column(column)
+            if level_counts is not None:
+                level = len(solution) - num_clues
+                if level >= len(level_counts):
+                    level_counts.extend([0] * (level + 1 - len(level_counts)))
+                level_counts[level] += 1
+            nodes += 1
+            solution.append(node)
+            select(node)
+            if constraint is not None and not constraint.push(row_index(node)):
+                backtracking = True
+
+    def __next__(self) -> Solution:
+        if not self._advance():
+            raise StopIteration
+        return self._row_indices(self._solution)
+
+    def __iter__(self):
+        return self
+
+    def count(self, level_counts: list[int] | None = None) -> int:
+        """Runs the rest of the search and returns the number of solutions, without building them. If
+        `level_counts` is given, the number of rows tried at each level below the clues is added to it."""
+        self._level_counts = level_counts
+        try:
+            n = 0
+            while self._advance():
+                n += 1
+            return n
+        finally:
+            self._level_counts = None
+
+    def branching(self) -> int | None:
+        """Returns the number of rows that the search tries next: the size of the primary column it would choose,
+        0 if one can no longer be covered, or None if all are. Right after a restart, that costs no search, only
+        the covers of the clues and excluded columns."""
+        if self._solution is None:
+            self._start()
+        column, size = self._choose_column()
+        return None if column is None else size
+
+    def prefixes(self, depth: int) -> 'DlxSolver':
+        """Turns the solver into an iterator over the partial solutions that select `depth` rows beyond the clues,
+        plus any complete solutions with fewer rows. Each one is listed clues first; used as the clues of a new
+        solver over the same matrix, it yields the solutions below it, in the order this solver would have."""
+        if self._solution is not None:
+            raise RuntimeError("The search has already started")
+        self._max_depth = depth
+        return self
+
+
+class NodeDlxSolver(DlxSolver):
+    """Dancing Links with one Node object per 1 in the matrix."""
+
+    def __init__(
+        self,
+        columns: Iterable[bool],
+        rows: Iterable[Iterable[int]],
+        clues: Iterable[int] | None = None,
+        engine: str = 'nodes',
+        sparse: bool = False,
+        excluded_columns: Iterable[int] = (),
+        constraint: RowConstraint | None = None,
+    ):
+        super().__init__(clues, excluded_columns, constraint)
         # Add column headers
         head = Head()
         left_node = head
@@ -62,31 +360,35 @@ class DlxSolver(Iterable[Solution]):
         left_node.right = head
         head.left = left_node
         # Add rows
+        row_nodes: list[Node | None] = []
         for row_idx, row in enumerate(rows):
             first_node = left_node = None
-            for column_head, v in zip(column_heads, row):
-                if v:
-                    up_node = column_head.up  # last node in column
-                    node = Node(
-                        up=up_node,
-                        down=column_head,
-                        left=left_node,
-                        right=None,
-                        column=column_head,
-                        row_idx=row_idx,
-                    )
-                    if first_node is None:
-                        first_node = node
-                    up_node.down = node
-                    if left_node:
-                        left_node.right = node
-                    column_head.up = node
-                    left_node = node
-                    column_head.size += 1
+            for column_head in (column_heads[i] for i in _row_columns(row, sparse)):
+                up_node = column_head.up  # last node in column
+                node = Node(
+                    up=up_node,
+                    down=column_head,
+                    left=left_node,
+                    right=None,
+                    column=column_head,
+                    row_idx=row_idx,
+                )
+                if first_node is None:
+                    first_node = node
+                up_node.down = node
+                if left_node:
+                    left_node.right = node
+                column_head.up = node
+                left_node = node
+                column_head.size += 1
+            row_nodes.append(first_node)
+            if first_node is None:
+                continue
             left_node.right = first_node
             first_node.left = left_node
         self._head = head
-        self._solutions = self._gen_solutions()
+        self._column_heads = column_heads
+        self._row_nodes = row_nodes
 
     @staticmethod
     def _cover(column):
@@ -106,47 +408,516 @@ class DlxSolver(Iterable[Solution]):
                 j.up.down, j.down.up = j, j
         column.left.right, column.right.left = column, column
 
-    def _node_by_idx(self, row_idx_):
-        for column_head in self._head.row_iterator():
-            for node in column_head.column_iterator():
-                if node.row_idx == row_idx_:
-                    return node
-        raise IndexError
-
-    def _gen_solutions(self):
-        solution = []
-        for node in (self._node_by_idx(i) for i in self._clues):
-            self._cover(node.column)
-            solution.append(node)
-            for j in node.row_iterator():
-                self._cover(j.column)
+    def _column(self, index: int) -> ColumnHead:
+        return self._column_heads[index]
 
-        def search():
+    def _choose_column(self) -> tuple[ColumnHead | None, int]:
+        try:
+            column = min((c for c in self._head.row_iterator() if c.primary), key=lambda c: c.size)
+        except ValueError:
+            return None, 0
+        return column, column.size
 
-            try:
-                selected_column = min((c for c in self._head.row_iterator() if c.primary), key=lambda c: c.size)
-            except ValueError:
-                # No more columns to cover; problem solved
-                yield [node.row_idx for node in solution]
+    @staticmethod
+    def _next_in_column(node):
+        return node.down
+
+    @staticmethod
+    def _column_of(node):
+        return node.column
+
+    @staticmethod
+    def _columns_in_row(node) -> list[ColumnHead]:
+        return [node.column, *(j.column for j in node.row_iterator())]
+
+    def _select(self, node) -> None:
+        for j in node.row_iterator():
+            self._cover(j.column)
+
+    def _deselect(self, node) -> None:
+        for j in node.row_iterator(reverse=True):
+            self._uncover(j.column)
+
+    @staticmethod
+    def _row_index(node) -> int:
+        return node.row_idx
+
+    @staticmethod
+    def _row_indices(solution) -> Solution:
+        return [node.row_idx for node in solution]
+
+
+class ArrayDlxSolver(DlxSolver):
+    """Dancing Links in the style of Knuth's DLX1: the links live in flat integer arrays indexed by node number.
+
+    Node 0 heads the list of primary columns, nodes 1..n are the column headers (in the order of `columns`) and
+    node n + 1 heads the list of secondary columns, so that only primary columns are ever scanned when choosing
+    the next column. Row nodes follow, stored row after row. Instead of Knuth's spacer nodes, every node keeps a
+    tuple of the other nodes in its row, which is the fastest way to walk a row in Python.
+    """
+
+    def __init__(
+        self,
+        columns: Iterable[bool],
+        rows: Iterable[Iterable[int]],
+        clues: Iterable[int] | None = None,
+        engine: str = 'array',
+        sparse: bool = False,
+        excluded_columns: Iterable[int] = (),
+        constraint: RowConstraint | None = None,
+    ):
+        super().__init__(clues, excluded_columns, constraint)
+        primary = list(columns)
+        num_columns = len(primary)
+        secondary_head = num_columns + 1
+        # Column headers
+        left = [0] * (num_columns + 2)
+        right = [0] * (num_columns + 2)
+        last_primary, last_secondary = 0, secondary_head
+        for column, is_primary in enumerate(primary, start=1):
+            if is_primary:
+                left[column], right[last_primary] = last_primary, column
+                last_primary = column
             else:
-                if selected_column.size == 0:
-                    # No rows left to cover selected_column; solution not found
-                    return
-                self._cover(selected_column)
-                for node in selected_column.column_iterator():
-                    solution.append(node)
-                    for j in node.row_iterator():
-                        self._cover(j.column)
-                    yield from search()
-                    node = solution.pop()
-                    for j in node.row_iterator(reverse=True):
-                        self._uncover(j.column)
-                self._uncover(selected_column)
-
-        return search()
-
-    def __next__(self):
-        return next(self._solutions)
+                left[column], right[last_secondary] = last_secondary, column
+                last_secondary = column
+        left[0], right[last_primary] = last_primary, 0
+        left[secondary_head], right[last_secondary] = last_secondary, secondary_head
+        top = [0] * (num_columns + 2)
+        up = list(range(num_columns + 2))
+        down = list(range(num_columns + 2))
+        size = [0] * (num_columns + 2)
+        others: list[tuple[int, ...]] = [()] * (num_columns + 2)
+        # Rows
+        row_start: list[int] = []
+        for row in rows:
+            first_node = len(top)
+            row_start.append(first_node)
+            for i in _row_columns(row, sparse):
+                column = i + 1
+                node = len(top)
+                top.append(column)
+                up.append(up[column])
+                down.append(column)
+                down[up[column]] = node
+                up[column] = node
+                size[column] += 1
+            nodes = tuple(range(first_node, len(top)))
+            others.extend(nodes[i + 1:] + nodes[:i] for i in range(len(nodes)))
+        row_start.append(len(top))
+        self._row_nodes = [start if start < end else None for start, end in zip(row_start, row_start[1:])]
+        self._top = top
+        self._up = up
+        self._down = down
+        self._left = left
+        self._right = right
+        self._size = size
+        self._others = others
+        self._row_start = row_start
 
-    def __iter__(self):
+    def _cover(self, column: int) -> None:
+        top, up, down, size, others = self._top, self._up, self._down, self._size, self._others
+        p = down[column]
+        while p != column:
+            for q in others[p]:
+                u, d = up[q], down[q]
+                down[u] = d
+                up[d] = u
+                size[top[q]] -= 1
+            p = down[p]
+        left, right = self._left, self._right
+        l, r = left[column], right[column]
+        right[l] = r
+        left[r] = l
+
+    def _uncover(self, column: int) -> None:
+        left, right = self._left, self._right
+        l, r = left[column], right[column]
+        right[l] = column
+        left[r] = column
+        top, up, down, size, others = self._top, self._up, self._down, self._size, self._others
+        p = up[column]
+        while p != column:
+            for q in others[p]:
+                down[up[q]] = q
+                up[down[q]] = q
+                size[top[q]] += 1
+            p = up[p]
+
+    def _select(self, node: int) -> None:
+        cover, top = self._cover, self._top
+        for j in self._others[node]:
+            cover(top[j])
+
+    def _deselect(self, node: int) -> None:
+        uncover, top = self._uncover, self._top
+        for j in reversed(self._others[node]):
+            uncover(top[j])
+
+    def _columns_in_row(self, node: int) -> list[int]:
+        top = self._top
+        return [top[node], *(top[j] for j in self._others[node])]
+
+    def _column(self, index: int) -> int:
+        if not 0 <= index < len(self._left) - 2:
+            raise IndexError(f"Column {index} out of range")
+        return index + 1
+
+    def _choose_column(self) -> tuple[int | None, int]:
+        right, size = self._right, self._size
+        column = right[0]
+        if column == 0:
+            return None, 0
+        selected_column, min_size = column, size[column]
+        while column != 0 and min_size > 0:
+            if size[column] < min_size:
+                selected_column, min_size = column, size[column]
+            column = right[column]
+        return selected_column, min_size
+
+    def _next_in_column(self, node: int) -> int:
+        return self._down[node]
+
+    def _column_of(self, node: int) -> int:
+        return self._top[node]
+
+    def _row_index(self, node: int) -> int:
+        return bisect_right(self._row_start, node) - 1
+
+    def _row_indices(self, solution: list[int]) -> Solution:
+        row_start = self._row_start
+        return [bisect_right(row_start, node) - 1 for node in solution]
+
+
+class BitsetDlxSolver(DlxSolver):
+    """Exact cover with the matrix held as Python ints used as bitsets.
+
+    Every column keeps the set of rows that cover it, and a single set holds the rows that are still live, i.e.
+    don't cover a covered column. Covering a column masks its rows out of the live set and uncovering restores the
+    live set from a stack, so choosing a column takes one AND and one popcount per open primary column and no
+    links are ever updated. The search itself is the same as for the other engines: it visits rows and columns
+    in the same order and yields the same solutions.
+
+    A node is the occurrence of a row in a column and is numbered stride * (row + 1) + column; the numbers below
+    the stride stand for the columns themselves.
+    """
+
+    def __init__(
+        self,
+        columns: Iterable[bool],
+        rows: Iterable[Iterable[int]],
+        clues: Iterable[int] | None = None,
+        engine: str = 'bitset',
+        sparse: bool = False,
+        excluded_columns: Iterable[int] = (),
+        constraint: RowConstraint | None = None,
+    ):
+        super().__init__(clues, excluded_columns, constraint)
+        primary = list(columns)
+        num_columns = len(primary)
+        stride = num_columns + 1
+        column_rows = [0] * num_columns
+        row_columns: list[tuple[int, ...]] = []
+        for row_idx, row in enumerate(rows):
+            row_columns.append(tuple(_row_columns(row, sparse)))
+            bit = 1 << row_idx
+            for column in row_columns[-1]:
+                column_rows[column] |= bit
+        self._stride = stride
+        self._primary = primary
+        self._open_primary = sum(1 << i for i, is_primary in enumerate(primary) if is_primary)
+        self._column_rows = column_rows
+        self._row_columns = row_columns
+        self._live = (1 << len(row_columns)) - 1
+        self._saved_live: list[int] = []
+        self._candidates = [0] * num_columns  # the live rows of each covered column when it was covered
+        self._row_nodes = [stride * (row_idx + 1) + row[0] if row else None for row_idx, row in enumerate(row_columns)]
+
+    def _cover(self, column: int) -> None:
+        live = self._live
+        self._saved_live.append(live)
+        self._candidates[column] = self._column_rows[column] & live
+        self._live = live & ~self._column_rows[column]
+        if self._primary[column]:
+            self._open_primary &= ~(1 << column)
+
+    def _uncover(self, column: int) -> None:
+        self._live = self._saved_live.pop()
+        if self._primary[column]:
+            self._open_primary |= 1 << column
+
+    def _select(self, node: int) -> None:
+        cover = self._cover
+        column = node % self._stride
+        for j in self._row_columns[node // self._stride - 1]:
+            if j != column:
+                cover(j)
+
+    def _deselect(self, node: int) -> None:
+        uncover = self._uncover
+        column = node % self._stride
+        for j in reversed(self._row_columns[node // self._stride - 1]):
+            if j != column:
+                uncover(j)
+
+    def _columns_in_row(self, node: int) -> list[int]:
+        column = node % self._stride
+        return [column, *(j for j in self._row_columns[node // self._stride - 1] if j != column)]
+
+    def _column(self, index: int) -> int:
+        if not 0 <= index < len(self._primary):
+            raise IndexError(f"Column {index} out of range")
+        return index
+
+    def _choose_column(self) -> tuple[int | None, int]:
+        open_primary, live, column_rows = self._open_primary, self._live, self._column_rows
+        selected_column, min_size = None, 0
+        while open_primary:
+            low_bit = open_primary & -open_primary
+            column = low_bit.bit_length() - 1
+            size = (column_rows[column] & live).bit_count()
+            if selected_column is None or size < min_size:
+                selected_column, min_size = column, size
+                if size == 0:
+                    break
+            open_primary ^= low_bit
+        return selected_column, min_size
+
+    def _next_in_column(self, node: int) -> int:
+        stride = self._stride
+        column = node % stride
+        start = node // stride  # the row after node, or 0 for the column itself
+        rest = self._candidates[column] >> start
+        if not rest:
+            return column
+        return stride * (start + (rest & -rest).bit_length()) + column
+
+    def _column_of(self, node: int) -> int:
+        return node % self._stride
+
+    def _row_index(self, node: int) -> int:
+        return node // self._stride - 1
+
+    def _row_indices(self, solution: list[int]) -> Solution:
+        stride = self._stride
+        return [node // stride - 1 for node in solution]
+
+
+class RustDlxSolver(DlxSolver):
+    """Exact cover by the rust_dlx_lib wheel, for the searches it can run: iterating over the solutions, with clues
+    and excluded columns and after a restart, but without a constraint, limits, level counts or prefixes.
+
+    The wheel takes dense rows and has no excluded columns, so every search hands it only the rows that cover no
+    excluded column, over the columns that are not excluded, and maps the rows of its solutions back.
+    """
+
+    def __init__(
+        self,
+        columns: Iterable[bool],
+        rows: Iterable[Iterable[int]],
+        clues: Iterable[int] | None = None,
+        engine: str = 'rust',
+        sparse: bool = False,
+        excluded_columns: Iterable[int] = (),
+        constraint: RowConstraint | None = None,
+    ):
+        if rust_dlx_lib is None:
+            raise ImportError("The 'rust' engine needs the rust_dlx_lib wheel")
+        if constraint is not None:
+            raise ValueError("The 'rust' engine takes no constraint")
+        super().__init__(clues, excluded_columns, constraint)
+        self._primary = list(columns)
+        self._row_columns = [tuple(_row_columns(row, sparse)) for row in rows]
+        self._native = None
+        self._rows: list[int] = []  # the row of the matrix for each row given to the wheel
+
+    def _start(self) -> None:
+        num_columns = len(self._primary)
+        excluded = set()
+        for index in self._excluded_columns:
+            if not 0 <= index < num_columns:
+                raise IndexError(f"Column {index} out of range")
+            excluded.add(index)
+        kept_columns = [column for column in range(num_columns) if column not in excluded]
+        position = {column: i for i, column in enumerate(kept_columns)}
+        rows, dense_rows, native_row = [], [], {}
+        for row_idx, row in enumerate(self._row_columns):
+            if row and excluded.isdisjoint(row):
+                dense_row = [0] * len(kept_columns)
+                for column in row:
+                    dense_row[position[column]] = 1
+                native_row[row_idx] = len(rows)
+                rows.append(row_idx)
+                dense_rows.append(dense_row)
+        clue_by_column = {}
+        for row_idx in self._clues:
+            if not 0 <= row_idx < len(self._row_columns):
+                raise IndexError(f"Clue {row_idx} is not a row index")
+            row = self._row_columns[row_idx]
+            if not row:
+                raise ValueError(f"Clue {row_idx} is an empty row")
+            index = next((column for column in row if column in excluded), None)
+            if index is not None:
+                raise ValueError(f"Clue {row_idx} covers excluded column {index}")
+            other = next((clue_by_column[c] for c in row if c in clue_by_column), None)
+            if other is not None:
+                raise ValueError(f"Clue {row_idx} conflicts with clue {other}")
+            clue_by_column.update((c, row_idx) for c in row)
+        clues = [native_row[row_idx] for row_idx in self._clues]
+        self._native = rust_dlx_lib.DlxSolver([self._primary[c] for c in kept_columns], dense_rows, clues)
+        self._rows = rows
+
+    def restart(self, clues: Iterable[int] | None = None, excluded_columns: Iterable[int] = ()) -> None:
+        self._clues = [] if clues is None else clues
+        self._excluded_columns = excluded_columns
+        self._native = None
+
+    def limit(self, nodes: int | None = None, deadline: float | None = None) -> 'DlxSolver':
+        if nodes is not None or deadline is not None:
+            raise ValueError("The 'rust' engine cannot limit a search")
         return self
+
+    def __next__(self) -> Solution:
+        if self._native is None:
+            self._start()
+        rows = self._rows
+        return [rows[i] for i in next(self._native)]
+
+    def count(self, level_counts: list[int] | None = None) -> int:
+        if level_counts is not None:
+            raise ValueError("The 'rust' engine does not count the rows tried")
+        return sum(1 for _ in self)
+
+    def branching(self) -> int | None:
+        raise ValueError("The 'rust' engine does not show the columns it chooses")
+
+    def prefixes(self, depth: int) -> 'DlxSolver':
+        raise ValueError("The 'rust' engine cannot stop a search at a depth")
+
+
+_ENGINES: dict[str, type[DlxSolver]] = {
+    'array': ArrayDlxSolver,
+    'nodes': NodeDlxSolver,
+    'bitset': BitsetDlxSolver,
+    'rust': RustDlxSolver,
+}
+
+# The arguments of every engine, by which DlxSolver finds the engine and the matrix however they are passed.
+_ENGINE_SIGNATURE = signature(BitsetDlxSolver.__init__)
+
+RUST_AVAILABLE = rust_dlx_lib is not None  # whether the 'rust' engine can be used
+
+# The bitset engine masks every row of the matrix in each step, so it only pays off up to some number of rows
+# times columns. It is 2 to 5 times faster than the array engine on every shape in the catalogue (up to 278 columns
+# by 7950 rows) and becomes slower around 1200 columns by 4800 rows; see bench/benchmarks.py engines.
+BITSET_MAX_CELLS = 4_000_000
+
+
+def _auto_engine(columns, rows) -> str:
+    if isinstance(columns, Sized) and isinstance(rows, Sized) and len(columns) * len(rows) <= BITSET_MAX_CELLS:
+        return 'bitset'
+    return 'array'
+
+
+_worker_solver: DlxSolver | None = None
+
+
+def _init_worker(columns, rows, sparse, constraint, engine) -> None:
+    global _worker_solver
+    _worker_solver = DlxSolver(columns, rows, engine=engine, sparse=sparse, constraint=constraint)
+
+
+def _solve_prefix(prefix: list[int], excluded_columns: list[int], first: bool) -> list[Solution]:
+    solver = _worker_solver
+    solver.restart(prefix, excluded_columns)
+    return list(islice(solver, 1)) if first else list(solver)
+
+
+def solver_pool(
+    columns: Iterable[bool],
+    rows: Iterable[Iterable[int]],
+    *,
+    sparse: bool = False,
+    constraint: RowConstraint | None = None,
+    engine: str = 'auto',
+    workers: int | None = None,
+) -> ProcessPoolExecutor:
+    """Returns a pool of `workers` processes that each build one DlxSolver over the matrix, with its own copy of
+    `constraint`, and restart it for every subtree that solve_parallel gives them. Pass it to solve_parallel to
+    search several problems over the same matrix, with other clues or excluded columns, without starting new
+    processes; shut it down when done."""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(list(columns), [list(row) for row in rows], sparse, constraint, engine),
+    )
+
+
+def shutdown_pool(executor: ProcessPoolExecutor, futures: Iterable[Future] | None = None) -> None:
+    """Shuts the pool down without waiting: cancels the work that has not started, and stops the workers if any of
+    `futures`, or any work at all if `futures` is None, may still be running."""
+    # ProcessPoolExecutor.terminate_workers is new in Python 3.14; before that, running work is left to finish in
+    # the background.
+    terminate_workers = getattr(executor, 'terminate_workers', None)
+    if terminate_workers is not None and (futures is None or not all(future.done() for future in futures)):
+        terminate_workers()
+    else:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def solve_parallel(
+    columns: Iterable[bool],
+    rows: Iterable[Iterable[int]],
+    clues: Iterable[int] | None = None,
+    *,
+    sparse: bool = False,
+    excluded_columns: Iterable[int] = (),
+    constraint: RowConstraint | None = None,
+    engine: str = 'auto',
+    depth: int = 2,
+    workers: int | None = None,
+    ordered: bool = False,
+    first: bool = False,
+    pool: ProcessPoolExecutor | None = None,
+) -> Iterator[Solution]:
+    """Iterates over the solutions of an exact cover problem, searching subtrees in a pool of `workers` processes.
+
+    The search tree is expanded to `depth` levels below the clues and every partial solution found there is
+    searched by a worker, which restarts its solver with it as the clues. Solutions are yielded as workers finish
+    unless `ordered` is set, in which case they come in the same order as from DlxSolver. If `first` is set, only
+    the first solution is yielded and the remaining workers are cancelled. A `constraint` must be picklable; every
+    worker has its own copy.
+
+    A `pool` from solver_pool, over the same matrix, constraint and engine, is used instead of a new one and left
+    running; only the subtrees not started yet are cancelled if the search stops early.
+    """
+    columns = list(columns)
+    rows = [list(row) for row in rows]
+    excluded_columns = list(excluded_columns)
+    solver = DlxSolver(
+        columns,
+        rows,
+        clues,
+        engine=engine,
+        sparse=sparse,
+        excluded_columns=excluded_columns,
+        constraint=deepcopy(constraint),
+    )
+    prefixes = list(solver.prefixes(depth))
+    if not prefixes:
+        return
+    executor = pool or solver_pool(columns, rows, sparse=sparse, constraint=constraint, engine=engine, workers=workers)
+    futures = [executor.submit(_solve_prefix, prefix, excluded_columns, first) for prefix in prefixes]
+    try:
+        for future in futures if ordered else as_completed(futures):
+            solutions = future.result()
+            if first and solutions:
+                yield solutions[0]
+                return
+            yield from solutions
+    finally:
+        if pool is not None:
+            for future in futures:
+                future.cancel()
+        else:
+            shutdown_pool(executor, futures)
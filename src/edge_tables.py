@@ -0,0 +1,205 @@
+"""Edges of every piece in every orientation, as 16-bit masks.
+
+Bit i of a mask is the cubit at position i of the edge, counted clockwise from the top left corner as in
+PadsBase.__getitem__, so side k of the edge is bits 4k to 4k + 4 (mod 16), corners included. Rotating an edge is
+a circular shift and flipping it a fixed bit permutation. The masks of a pad are computed once, on first use, and
+shared by all the parts.
+"""
+from collections.abc import Sequence
+from functools import cache
+from itertools import combinations
+
+from pads import PadsBase
+
+# Orientation name: (direction, offset). Position i of the oriented edge is position (offset + direction * i) % 16
+# of the edge as drawn on the pad; the R's rotate it clockwise by quarter turns, the F's flip it over first.
+ORIENTATIONS: dict[str, tuple[int, int]] = {
+    'R0': (1, 0),
+    'R1': (1, 12),
+    'R2': (1, 8),
+    'R3': (1, 4),
+    'F0': (-1, 4),
+    'F1': (-1, 8),
+    'F2': (-1, 12),
+    'F3': (-1, 0),
+}
+_ORIENTATION_INDEXES = {name: k for k, name in enumerate(ORIENTATIONS)}
+
+FULL = 0xFFFF
+CORNERS = 0x1111  # positions 0, 4, 8 and 12
+MIDS = 0x4444  # the middle of each side: positions 2, 6, 10 and 14
+OTHERS = 0xAAAA  # the odd positions, next to a corner
+_INNER = 0b01110  # the positions of a side that only two tiles share
+
+_REVERSED_BYTES = [int(f"{b:08b}"[::-1], 2) for b in range(256)]
+_REVERSED_SIDES = [int(f"{b:05b}"[::-1], 2) for b in range(32)]
+
+
+def to_mask(edge: list[int]) -> int:
+    return sum(1 << i for i, v in enumerate(edge) if v)
+
+
+def to_edge(mask: int) -> list[int]:
+    return [(mask >> i) & 1 for i in range(16)]
+
+
+def rotate(mask: int, k: int = 1) -> int:
+    """Returns the edge turned clockwise by k quarter turns, which is orientation Rk of an R0 edge."""
+    n = 4 * k % 16
+    return ((mask << n) | (mask >> (16 - n))) & FULL
+
+
+def flip(mask: int) -> int:
+    """Returns the edge turned over around the diagonal through position 0, which is orientation F3 of an R0
+    edge."""
+    reversed_ = (_REVERSED_BYTES[mask & 0xFF] << 8) | _REVERSED_BYTES[mask >> 8]
+    return ((reversed_ << 1) | (reversed_ >> 15)) & FULL
+
+
+def orient(mask: int, orientation: str) -> int:
+    """Returns the R0 edge `mask` in given orientation."""
+    direction, offset = ORIENTATIONS[orientation]
+    if direction == -1:
+        return rotate(flip(mask), offset // 4)
+    return rotate(mask, -offset // 4)
+
+
+def count_cubits(mask: int) -> tuple[int, int, int]:
+    """Returns the number of corner, mid-side and other cubits on the edge."""
+    return (mask & CORNERS).bit_count(), (mask & MIDS).bit_count(), (mask & OTHERS).bit_count()
+
+
+def side(mask: int, k: int) -> int:
+    """Returns side k of the edge as 5 bits, from its first corner to its last."""
+    return ((mask | mask << 16) >> (4 * k)) & 0b11111
+
+
+def sides_fit(mask1: int, k1: int, mask2: int, k2: int) -> bool:
+    """Returns whether side k1 of one edge and side k2 of another can be joined: they run in opposite directions,
+    must not both have a cubit in the same place, and must fill the three places between the corners."""
+    side1 = side(mask1, k1)
+    side2 = _REVERSED_SIDES[side(mask2, k2)]
+    return not side1 & side2 and (side1 | side2) & _INNER == _INNER
+
+
+def side_kind(side_: int) -> int:
+    """Returns the side, given as by side(), or the same side read the other way round if that is less. Two sides
+    can only be joined if sides_fit allows it for their kinds one way round or the other."""
+    return min(side_, _REVERSED_SIDES[side_])
+
+
+def side_kinds(mask: int) -> tuple[int, ...]:
+    return tuple(side_kind(side(mask, k)) for k in range(4))
+
+
+def _kinds_fit(kind1: int, kind2: int) -> bool:
+    return sides_fit(kind1, 0, kind2, 0) or sides_fit(kind1, 0, _REVERSED_SIDES[kind2], 0)
+
+
+# The kinds with at most one of the three places between the corners filled, grouped by those places, and the kinds
+# each can be joined to, which have at least two of them filled.
+_SIDE_KINDS = sorted({side_kind(s) for s in range(32)})
+_KIND_GROUPS: dict[int, list[int]] = {}
+for _kind in _SIDE_KINDS:
+    if (_kind & _INNER).bit_count() <= 1:
+        _KIND_GROUPS.setdefault(side_kind(_kind & _INNER), []).append(_kind)
+_KIND_PARTNERS = {k1: [k2 for k2 in _SIDE_KINDS if _kinds_fit(k1, k2)] for g in _KIND_GROUPS.values() for k1 in g}
+_KIND_GROUP_PARTNERS = [(g, sorted({k2 for k1 in g for k2 in _KIND_PARTNERS[k1]})) for g in _KIND_GROUPS.values()]
+
+
+def sides_pair_up(counts: Sequence[int]) -> bool:
+    """Returns whether sides with counts[kind] sides of each kind could be joined in pairs, as they must be on a
+    shape when no tack stitch joins more than two sides: Hall's condition for the graph of the kinds that fit. It
+    only fails when there is no way at all to join them, whatever the orientations."""
+    for group, right in _KIND_GROUP_PARTNERS:
+        left = [kind for kind in group if counts[kind]]
+        if sum(counts[kind] for kind in left) != sum(counts[kind] for kind in right):
+            return False
+        for r in range(1, len(left) + 1):
+            for subset in combinations(left, r):
+                partners = {k2 for k1 in subset for k2 in _KIND_PARTNERS[k1]}
+                if sum(counts[kind] for kind in subset) > sum(counts[kind] for kind in partners):
+                    return False
+    return True
+
+
+@cache
+def pad_masks(pad: PadsBase) -> tuple[tuple[int, ...], ...]:
+    """Returns the masks of the pad's pieces: entry n - 1 holds those of piece n in the order of ORIENTATIONS."""
+    table = []
+    for index in range(1, 7):
+        mask = to_mask(pad[index])
+        table.append(tuple(orient(mask, orientation) for orientation in ORIENTATIONS))
+    return tuple(table)
+
+
+def edge_masks(pad: PadsBase, index: int) -> tuple[int, ...]:
+    """Returns the masks of the piece in each orientation, in the order of ORIENTATIONS."""
+    if not 1 <= index <= 6:
+        raise IndexError(f"No piece {index} in {pad!r}")
+    return pad_masks(pad)[index - 1]
+
+
+def edge_mask(pad: PadsBase, index: int, orientation: str = 'R0') -> int:
+    return edge_masks(pad, index)[_ORIENTATION_INDEXES[orientation]]
+
+
+def oriented_edge(pad: PadsBase, index: int, orientation: str = 'R0') -> list[int]:
+    """Returns the edge of the piece in given orientation as a list of 16 zeros and ones."""
+    return to_edge(edge_mask(pad, index, orientation))
+
+
+@cache
+def distinct_orientations(pad: PadsBase, index: int) -> tuple[str, ...]:
+    """Returns the orientations that give the piece distinct edges: of orientations that are the same because the
+    piece is symmetric, only the first in the order of ORIENTATIONS."""
+    seen = set()
+    orientations = []
+    for orientation, mask in zip(ORIENTATIONS, edge_masks(pad, index)):
+        if mask not in seen:
+            seen.add(mask)
+            orientations.append(orientation)
+    return tuple(orientations)
+
+
+@cache
+def symmetry_group(pad: PadsBase, index: int) -> tuple[str, ...]:
+    """Returns the orientations that leave the piece unchanged, R0 first. Every distinct orientation stands for
+    8 / len(symmetry_group) orientations."""
+    masks = edge_masks(pad, index)
+    return tuple(orientation for orientation, mask in zip(ORIENTATIONS, masks) if mask == masks[0])
+
+
+_SYMMETRY_CLASSES = {
+    (1, False): 'C1',  # no symmetry
+    (2, False): 'C2',  # unchanged by a half turn
+    (4, False): 'C4',  # unchanged by a quarter turn
+    (2, True): 'D1',  # unchanged by a flip
+    (4, True): 'D2',  # unchanged by a half turn and two flips
+    (8, True): 'D4',  # unchanged by anything
+}
+
+
+def symmetry_class(pad: PadsBase, index: int) -> str:
+    """Returns the name of the piece's symmetry group: Cn if it only has the rotations by multiples of 1/n turn, Dn
+    if it also has n flips."""
+    group = symmetry_group(pad, index)
+    return _SYMMETRY_CLASSES[(len(group), any(orientation.startswith('F') for orientation in group))]
+
+
+@cache
+def edge_positions(pad: PadsBase, index: int, orientation: str = 'R0') -> tuple[int, ...]:
+    """Returns the positions of the cubits on the edge of the piece in given orientation."""
+    mask = edge_mask(pad, index, orientation)
+    return tuple(i for i in range(16) if (mask >> i) & 1)
+
+
+if __name__ == '__main__':
+    from pads import PadsDublin, PadsSkatoy
+
+    for pads in (PadsDublin, PadsSkatoy):
+        for pad in pads:
+            for index in range(1, 7):
+                if len(symmetry_group(pad, index)) > 1:
+                    orientations = ' '.join(distinct_orientations(pad, index))
+                    print(f"{pad:<20} {index} {symmetry_class(pad, index)}: {orientations}")
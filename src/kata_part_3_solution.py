@@ -1,95 +1,96 @@
-from collections.abc import Generator, Iterator, Sequence
-from enum import Enum
-from functools import cache
-from itertools import chain
-from random import shuffle
-from typing import Any, ParamSpec, TypeVar
-
-from rust_dlx_lib import DlxSolver
-# from dlx_solver import DlxSolver
-
+from collections.abc import AsyncIterator, Collection, Generator, Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import cache, lru_cache
+from itertools import islice
+from os import cpu_count
+from random import sample, shuffle
+from time import monotonic
+from typing import Any, NamedTuple, ParamSpec, TypeVar
+
+from compiled_shape import compile_shape
+from dlx_solver import RUST_AVAILABLE, DlxSolver, SearchLimitReached, shutdown_pool, solve_parallel, solver_pool
+from edge_tables import (
+    ORIENTATIONS,
+    count_cubits,
+    distinct_orientations,
+    edge_mask,
+    oriented_edge,
+    side_kinds,
+    sides_pair_up,
+)
 from pads import PadsBase, PadsDublin
+from shape_symmetry import (
+    Automorphism,
+    automorphisms,
+    canonical_placements,
+    is_canonical,
+    orbit,
+    stabilizer,
+    unique_solutions,
+)
 from shapes import Shapes
-from time_guard import time_guard
+from time_guard import WorkerPool
 
 PieceSpec = tuple[PadsBase, int]
 HintSpec = tuple[int, PadsBase, int, str]
 SolutionSpec = list[tuple[int, PadsBase, int, str]]
 
+RESTART_NODES = 16000  # rows selected before solve_one first starts over; see _luby
+FEASIBILITY_CACHE_SIZE = 4  # filter_pieces lattices kept, up to some 25 MB each, the least recently used dropped first
+# The engine of the searches that need no feature beyond what the rust_dlx_lib wheel has: the wheel if it is
+# installed. The others run on the pure-Python engines; see dlx_solver.RustDlxSolver.
+NATIVE_ENGINE = 'rust' if RUST_AVAILABLE else 'auto'
+
 P = ParamSpec("P")
 R = TypeVar("R")
 
 
-class Orientations(Enum):
-    R0 = (1, 0)
-    R1 = (1, 12)
-    R2 = (1, 8)
-    R3 = (1, 4)
-    F0 = (-1, 4)
-    F1 = (-1, 8)
-    F2 = (-1, 12)
-    F3 = (-1, 0)
-
-    def __init__(self, direction: int, offset: int) -> None:
-        self._indexes = [(offset + direction * i) % 16 for i in range(16)]
-
-    def apply_to(self, edge: list[int]) -> Iterator[int]:
-        return (edge[i] for i in self._indexes)
+def get_edge(pad: PadsBase, index: int) -> list[int]:
+    """Returns the edge of the piece with given index of given pad"""
+    return oriented_edge(pad, index)
 
 
 @cache
-def get_edge(pad: PadsBase, index: int) -> list[int]:
-    """Returns the edge of the piece with given index of given pad"""
-    c = str(index)
-    lines = pad.value.splitlines()
-    row_min = next(i for i, row in enumerate(lines) if c in row)
-    row_max = row_min + 4
-    col_min = min(next(j for j, v in enumerate(row) if v == c) for row in lines[row_min: row_max + 1])
-    col_max = col_min + 4
-    return list(chain(
-        (int(lines[row_min][i] == c) for i in range(col_min, col_max)),
-        (int(lines[i][col_max] == c) for i in range(row_min, row_max)),
-        (int(lines[row_max][i] == c) for i in range(col_max, col_min, -1)),
-        (int(lines[i][col_min] == c) for i in range(row_max, row_min, -1)),
-    ))
+def get_cubits(pad: PadsBase, index: int) -> tuple[int, int, int]:
+    """Returns the number of corner, mid-side and other cubits on the edge of the piece with given index of given
+    pad"""
+    return count_cubits(edge_mask(pad, index))
 
 
 def get_shape_slots(
     tiles: list[tuple[int, int, int, int]],
     tack_stitches: list[tuple[int, int]] | None = None,
 ) -> list[int]:
-    num_tiles = len(tiles)
-    res = list(range(num_tiles * 16))
-
-    def find(i: int) -> int:
-        if res[i] == i:
-            return i
-        root = find(res[i])
-        res[i] = root
-        return root
-
-    def union(i: int, j: int) -> None:
-        i = find(i)
-        j = find(j)
-        if i != j:
-            res[i] = j
-
-    for tile1, neighbors in enumerate(tiles):
-        for edge1, tile2 in enumerate(neighbors):
-            if tile2 > tile1:
-                edge2 = next(i for i, v in enumerate(tiles[tile2]) if v == tile1)
-                for i in range(5):
-                    slot1 = 16 * tile1 + (4 * edge1 + i) % 16
-                    slot2 = 16 * tile2 + (4 * edge2 + 4 - i) % 16
-                    union(slot1, slot2)
-    if tack_stitches:
-        for s1, s2 in tack_stitches:
-            union(s1, s2)
-
-    for i in range(len(res)):
-        find(i)
-
-    return res
+    return list(compile_shape(tiles, tack_stitches).slots)
+
+
+@lru_cache(maxsize=FEASIBILITY_CACHE_SIZE)
+def _feasibility(
+    cubits: tuple[tuple[int, int, int], ...],
+    targets: tuple[int, int, int, int],
+) -> tuple[tuple[int, ...], list[int], list[bytes]]:
+    """Returns the strides of the cells of filter_pieces' lattices, the cell offset of each of the pieces with the
+    given corner, mid-side and other cubits, and the lattices. The one at index i has a bit for every (pieces,
+    corners, mids, others) still needed, up to `targets`, that the pieces from i on can supply, at cell
+    ((k * sizes[1] + c) * sizes[2] + m) * sizes[3] + o."""
+    # Each dimension has room for the largest piece past its target, so that adding a piece never carries into the
+    # next dimension.
+    cs, ms, os = zip(*cubits)
+    sizes = (targets[0] + 1, *(t + max(v) + 1 for t, v in zip(targets[1:], (cs, ms, os))))
+    strides = (sizes[1] * sizes[2] * sizes[3], sizes[2] * sizes[3], sizes[3], 1)
+    valid = 1
+    for t, stride in zip(reversed(targets), reversed(strides)):
+        valid = sum(valid << (stride * v) for v in range(t + 1))
+    shifts = [strides[0] + c * strides[1] + m * strides[2] + o * strides[3] for c, m, o in cubits]
+    # The bits are tested as bytes, since shifting an int that long to test one of them would copy it. Each lattice
+    # ends with its highest bit; the fewer pieces it covers, the shorter it is.
+    feasible = [b''] * (len(cubits) + 1)
+    bits = 1
+    for i in range(len(cubits), -1, -1):
+        feasible[i] = bits.to_bytes(bits.bit_length() // 8 + 1, 'little')
+        if i:
+            bits = (bits | bits << shifts[i - 1]) & valid
+    return strides, shifts, feasible
 
 
 def filter_pieces(
@@ -97,14 +98,17 @@ def filter_pieces(
     pieces: Sequence[PieceSpec],
     hints: list[HintSpec] | None = None,
     tack_stitches: list[tuple[int, int]] | None = None,
+    stats: dict[str, int] | None = None,
 ) -> Generator[tuple[PieceSpec], None, None]:
+    """Yields the subsets of the pieces, hinted pieces left out, that have as many corner, mid-side and other cubits
+    as the shape needs and whose sides, with those of the hinted pieces, could be joined in pairs; see
+    edge_tables.sides_pair_up. If `stats` is given, the numbers of subsets with the right cubits that are rejected
+    for their sides and that pass are added to its 'rejected' and 'passed' entries."""
     hints = hints or []
-    slots = get_shape_slots(shape, tack_stitches)
-    num_tiles = len(shape)
-    corners = {slots[tile * 16 + i] for tile in range(num_tiles) for i in range(0, 16, 4)}
-    num_corners = len(corners)
-    piece_map = {(pad, index): (sum(i for i in edge[0::4]), sum(i for i in edge[2::4]), sum(i for i in edge[1::2]))
-                 for pad, index in pieces for edge in (get_edge(pad, index),)}
+    compiled = compile_shape(shape, tack_stitches)
+    num_tiles = compiled.num_tiles
+    num_corners = len(compiled.corner_slots)
+    piece_map = {piece: get_cubits(*piece) for piece in pieces}
     # cubit totals contributed by hints
     hints_cubits = tuple(sum(piece_map[(pad, index)][i] for _, pad, index, _ in hints) for i in range(3))
 
@@ -124,64 +128,127 @@ def filter_pieces(
     ms = [ms[i] for i in order]
     os = [os[i] for i in order]
 
-    # Suffix sums for reachability pruning (upper bounds)
-    sc = [0] * (n + 1)
-    sm = [0] * (n + 1)
-    so = [0] * (n + 1)
-    for i in range(n - 1, -1, -1):
-        sc[i] = sc[i + 1] + cs[i]
-        sm[i] = sm[i + 1] + ms[i]
-        so[i] = so[i + 1] + os[i]
+    if min(target_pieces, target_corners, target_mid, target_other) < 0:
+        return
+    targets = (target_pieces, target_corners, target_mid, target_other)
+    strides, shifts, feasible = _feasibility(tuple(zip(cs, ms, os)), targets)
 
-    dead = set()  # memo of dead states
+    def is_feasible(i: int, cell: int) -> bool:
+        lattice, byte = feasible[i], cell >> 3
+        return byte < len(lattice) and bool(lattice[byte] >> (cell & 7) & 1)
 
-    def dfs(i: int, k: int, c: int, m: int, o: int, chosen: tuple) -> Iterator[tuple]:
-        state = (i, k, c, m, o)
-        if state in dead:
+    def dfs(i: int, need: tuple[int, int, int, int], cell: int, chosen: tuple) -> Iterator[tuple]:
+        if i == n:
+            yield chosen
             return
-
-        # success
-        if k == target_pieces:
-            if c == target_corners and m == target_mid and o == target_other:
-                yield chosen
+        k, c, m, o = need
+        # include
+        if k and c >= cs[i] and m >= ms[i] and o >= os[i] and is_feasible(i + 1, cell - shifts[i]):
+            yield from dfs(i + 1, (k - 1, c - cs[i], m - ms[i], o - os[i]), cell - shifts[i], chosen + (pieces[i],))
+        # skip
+        if is_feasible(i + 1, cell):
+            yield from dfs(i + 1, need, cell, chosen)
+
+    # Tack stitches can join the places between the corners of more than two sides, and then sides_pair_up does not
+    # apply.
+    paired = compiled.sides_paired
+    hints_counts = [0] * 32
+    for _, pad, index, _ in hints:
+        for kind in side_kinds(edge_mask(pad, index)):
+            hints_counts[kind] += 1
+    piece_kinds = {piece: side_kinds(edge_mask(*piece)) for piece in pieces}
+
+    def sides_fail(subset: tuple[PieceSpec]) -> bool:
+        counts = hints_counts.copy()
+        for piece in subset:
+            for kind in piece_kinds[piece]:
+                counts[kind] += 1
+        return paired and not sides_pair_up(counts)
+
+    stats = stats if stats is not None else {}
+    stats.setdefault('rejected', 0)
+    stats.setdefault('passed', 0)
+    cell = sum(t * stride for t, stride in zip(targets, strides))
+    if is_feasible(0, cell):
+        for subset in dfs(0, targets, cell, tuple()):
+            if sides_fail(subset):
+                stats['rejected'] += 1
             else:
-                dead.add(state)
-            return
+                stats['passed'] += 1
+                yield subset
 
-        # out or not enough remaining
-        if i == n or n - i < target_pieces - k:
-            dead.add(state)
-            return
-
-        # overshoot
-        if c > target_corners or m > target_mid or o > target_other:
-            dead.add(state)
-            return
-
-        # unreachable even taking everything left
-        if c + sc[i] < target_corners or m + sm[i] < target_mid or o + so[i] < target_other:
-            dead.add(state)
-            return
 
-        found = False
+class CubitBudget:
+    """Prunes the single-pass search (see Problem) with the bounds that filter_pieces applies to whole subsets.
 
-        # include
-        for sol in dfs(i + 1, k + 1, c + cs[i], m + ms[i], o + os[i], chosen + (pieces[i],)):
-            found = True
-            yield sol
+    The tiles left to fill need exactly the corner, mid-side and other cubits still missing. Whenever a piece is
+    placed, the search goes on only if, for each kind, the smallest and the largest number of cubits that the
+    unused pieces can bring to the remaining tiles enclose the number missing. Counts of the unused pieces by
+    number of cubits, which never exceeds 8, make that check a few dozen steps.
+    """
 
-        # skip
-        for sol in dfs(i + 1, k, c, m, o, chosen):
-            found = True
-            yield sol
+    def __init__(
+        self,
+        num_tiles: int,
+        targets: tuple[int, int, int],
+        pieces: Iterable[PieceSpec],
+        row_pieces: list[PieceSpec],
+    ) -> None:
+        self._num_tiles = num_tiles
+        self._missing = list(targets)
+        self._row_cubits = [get_cubits(*piece) for piece in row_pieces]
+        self._unused = [[0] * 9 for _ in range(3)]
+        for piece in pieces:
+            for unused, n in zip(self._unused, get_cubits(*piece)):
+                unused[n] += 1
+
+    def push(self, row_idx: int) -> bool:
+        self._num_tiles -= 1
+        for i, n in enumerate(self._row_cubits[row_idx]):
+            self._missing[i] -= n
+            self._unused[i][n] -= 1
+        return all(self._feasible(unused, missing) for unused, missing in zip(self._unused, self._missing))
+
+    def pop(self, row_idx: int) -> None:
+        self._num_tiles += 1
+        for i, n in enumerate(self._row_cubits[row_idx]):
+            self._missing[i] += n
+            self._unused[i][n] += 1
+
+    def _feasible(self, unused: list[int], missing: int) -> bool:
+        least = most = 0
+        k = self._num_tiles
+        for n, count in enumerate(unused):
+            taken = min(count, k)
+            least += n * taken
+            k -= taken
+            if k == 0:
+                break
+        else:
+            return False  # fewer unused pieces than tiles
+        k = self._num_tiles
+        for n in range(len(unused) - 1, -1, -1):
+            taken = min(unused[n], k)
+            most += n * taken
+            k -= taken
+            if k == 0:
+                break
+        return least <= missing <= most
 
-        if not found:
-            dead.add(state)
 
-    yield from dfs(0, 0, 0, 0, 0, tuple())
+class Problem:
+    """The exact cover problem of a shape.
 
+    By default the pieces are optional and the caller restricts each search to a subset of them that fills the
+    shape, as found by filter_pieces. With `single_pass`, each tile gets a column of its own, so that every
+    solution places exactly one piece per tile, and a CubitBudget prunes the search; the solver then picks the
+    pieces itself in one search over all of them.
 
-class Problem:
+    With `symmetry`, every search skips solutions that an automorphism of the shape (see shape_symmetry) turns
+    into one already found: one of the pieces may only take one placement per orbit of its placements, which
+    secondary orbit columns in the rows of its other placements enforce. 'canonical' then yields one solution
+    per orbit of solutions and 'expand' every solution of each orbit in turn.
+    """
 
     def __init__(
         self,
@@ -189,61 +256,244 @@ class Problem:
         pieces: Sequence[PieceSpec],
         hints: list[HintSpec],
         tack_stitches: list[tuple[int, int]],
+        single_pass: bool = False,
+        symmetry: str | None = None,
     ) -> None:
+        if symmetry not in (None, 'canonical', 'expand'):
+            raise ValueError(f"Unknown symmetry mode {symmetry!r}")
+        if symmetry is not None and single_pass:
+            raise ValueError("Symmetry breaking needs a piece that every solution uses, unlike single-pass solutions")
+        self._shape = shape
         self._num_tiles: int = len(shape)
         self._pieces: Sequence[PieceSpec] = pieces
-        self._slots: list[int] = get_shape_slots(shape, tack_stitches)
+        self._compiled = compile_shape(shape, tack_stitches)
         self._hints: list[HintSpec] = hints
+        self._single_pass = single_pass
+        self._symmetry = symmetry
+        self._group: list[Automorphism] = []
+        self._orbit_columns: dict[PieceSpec, int] = {}
         self._row_mapping = {}
-
-    def solve(self) -> Iterator[SolutionSpec]:
+        self._row_specs: list[tuple[int, PadsBase, int, str]] = []  # inverse of _row_mapping
+        self._piece_columns: dict[PieceSpec, int] = {}
+        self._matrix_: tuple[list[bool], list[list[int]], list[int]] | None = None
+        self._solvers: dict[str, DlxSolver] = {}  # by engine
+        self._check_hints()
+
+    def _check_hints(self) -> None:
+        """Raises ValueError, naming the hints, if a hint is not a placement of one of the pieces or two hints
+        cannot both hold: they are on the same tile, place the same piece or cover the same slot."""
+        covered: dict[int, HintSpec] = {}
+        for k, hint in enumerate(self._hints):
+            tile, pad, index, orientation = hint
+            if not 0 <= tile < self._num_tiles:
+                raise ValueError(f"Hint {hint} is on no tile of the shape")
+            if (pad, index) not in self._pieces:
+                raise ValueError(f"Hint {hint} places a piece that is not one of the pieces")
+            if orientation not in ORIENTATIONS:
+                raise ValueError(f"Hint {hint} has no orientation {orientation!r}")
+            for other in self._hints[:k]:
+                if other[0] == tile:
+                    raise ValueError(f"Hints {other} and {hint} are on the same tile")
+                if other[1:3] == (pad, index):
+                    raise ValueError(f"Hints {other} and {hint} place the same piece")
+            for slot in self._compiled.row_template(tile, edge_mask(pad, index, orientation)):
+                if slot in covered:
+                    raise ValueError(f"Hints {covered[slot]} and {hint} cover the same slot")
+                covered[slot] = hint
+
+    def matrix(self) -> tuple[list[bool], list[list[int]], list[int]]:
+        """Returns the columns, sparse rows and clues of the exact cover problem, building them on first use."""
+        if self._matrix_ is None:
+            self._matrix_ = self._build_matrix()
+        return self._matrix_
+
+    def _build_matrix(self) -> tuple[list[bool], list[list[int]], list[int]]:
         pieces = [p for p in self._pieces]
         shuffle(pieces)
-        slots = set(self._slots)
-        columns = [True] * len(slots) + [False] * len(pieces)
+        num_slots = self._compiled.num_slots
+        num_tile_columns = self._num_tiles if self._single_pass else 0
+        columns = [True] * (num_slots + num_tile_columns) + [False] * len(pieces)
         rows = []
-        slot_map = {j: i for i, j in enumerate(slots)}
+        canonical = {}
+        if self._symmetry is not None:
+            self._group = stabilizer(automorphisms(self._shape, self._compiled.slots), self._hints)
+            hint_pieces = {(pad, index) for _, pad, index, _ in self._hints}
+            for pad, index in pieces:
+                if len(self._group) > 1 and (pad, index) not in hint_pieces:
+                    self._orbit_columns[(pad, index)] = len(columns)
+                    columns.append(False)
+                    canonical[(pad, index)] = canonical_placements(self._group, self._num_tiles, pad, index)
         row_index = 0
         for tile in range(self._num_tiles):
             hint = next((h for h in self._hints if h[0] == tile), None)
             _, hint_pad, hint_index, hint_orientation = hint if hint else (None, None, None, None)
-            for piece_column, (pad, index) in enumerate(pieces, start=len(slots)):
+            for piece_column, (pad, index) in enumerate(pieces, start=num_slots + num_tile_columns):
+                self._piece_columns[(pad, index)] = piece_column
                 if hint is not None and (pad, index) != (hint_pad, hint_index):
                     continue
-                edge = get_edge(pad, index)
-                rows_for_piece = set()
-                for orientation in Orientations:
-                    if hint is not None and orientation.name != hint_orientation:
-                        continue
-                    edge_ = orientation.apply_to(edge)
-                    row = [0] * (len(slots) + len(pieces))
-                    for slot in (slot_map[self._slots[tile * 16 + i]] for i, cubit in enumerate(edge_)
-                                 if cubit == 1):
-                        row[slot] = 1
-                    row[piece_column] = 1
-                    if tuple(row) in rows_for_piece:
-                        continue
-                    rows_for_piece.add(tuple(row))
+                # The distinct orientations give distinct rows, so symmetric pieces get no duplicate rows.
+                orientations = distinct_orientations(pad, index) if hint is None else (hint_orientation,)
+                for orientation in orientations:
+                    row = list(self._compiled.row_template(tile, edge_mask(pad, index, orientation)))
+                    if self._single_pass:
+                        row.append(num_slots + tile)
+                    row.append(piece_column)
+                    if (pad, index) in canonical and (tile, pad, index, orientation) not in canonical[(pad, index)]:
+                        row.append(self._orbit_columns[(pad, index)])
                     rows.append(row)
-                    self._row_mapping[(tile, pad, index, orientation.name)] = row_index
+                    self._row_mapping[(tile, pad, index, orientation)] = row_index
+                    self._row_specs.append((tile, pad, index, orientation))
                     row_index += 1
         clues = [self._row_mapping[hint] for hint in self._hints]
-        solver = DlxSolver(columns=columns, rows=rows, clues=clues)
+        return columns, rows, clues
+
+    def shuffle(self) -> None:
+        """Puts the rows of each tile in a new random order. That changes the order in which the searches try the
+        placements, not the solutions they find. The matrix is kept; the solver is built again on next use."""
+        columns, rows, _ = self.matrix()
+        order = sorted(sample(range(len(rows)), len(rows)), key=lambda i: self._row_specs[i][0])
+        self._row_specs = [self._row_specs[i] for i in order]
+        self._row_mapping = {spec: i for i, spec in enumerate(self._row_specs)}
+        self._matrix_ = columns, [rows[i] for i in order], [self._row_mapping[hint] for hint in self._hints]
+        self._solvers.clear()
+
+    def _constraint(self) -> CubitBudget | None:
+        if not self._single_pass:
+            return None
+        targets = (len(self._compiled.corner_slots), 2 * self._num_tiles, 4 * self._num_tiles)
+        row_pieces = [(pad, index) for _, pad, index, _ in self._row_specs]
+        return CubitBudget(self._num_tiles, targets, self._pieces, row_pieces)
+
+    def _symmetry_piece(self, subset: Collection[PieceSpec] | None) -> PieceSpec | None:
+        """Returns the piece whose placements are restricted to one per orbit when searching `subset`: the first
+        of those with the most distinct orientations, as those have the fewest symmetric placements."""
+        candidates = [piece for piece in (self._pieces if subset is None else subset) if piece in self._orbit_columns]
+        return max(candidates, key=lambda piece: len(distinct_orientations(*piece)), default=None)
+
+    def excluded_columns(self, subset: Collection[PieceSpec] | None) -> list[int]:
+        """Returns the columns of the pieces that are not in `subset`, and the orbit column of the symmetry piece."""
+        symmetry_piece = self._symmetry_piece(subset)
+        excluded_columns = [] if symmetry_piece is None else [self._orbit_columns[symmetry_piece]]
+        if subset is None:
+            return excluded_columns
+        if self._single_pass:
+            raise ValueError("A single-pass problem chooses the pieces itself")
+        subset = set(subset)
+        return excluded_columns + [column for piece, column in self._piece_columns.items() if piece not in subset]
+
+    def solver(self, subset: Collection[PieceSpec] | None, engine: str = 'auto') -> DlxSolver:
+        """Returns a solver restricted to the pieces in `subset`. The solver of each engine is built once, and
+        again after shuffle(), and restarted for every subset after the first, so only one search per Problem and
+        engine can be in progress at a time."""
+        columns, rows, clues = self.matrix()
+        excluded_columns = self.excluded_columns(subset)
+        solver = self._solvers.get(engine)
+        if solver is None:
+            solver = self._solvers[engine] = DlxSolver(
+                columns=columns,
+                rows=rows,
+                clues=clues,
+                engine=engine,
+                sparse=True,
+                excluded_columns=excluded_columns,
+                constraint=self._constraint(),
+            )
+        else:
+            solver.restart(clues, excluded_columns)
+        return solver
+
+    def search(
+        self,
+        subset: Collection[PieceSpec] | None,
+        nodes: int | None = None,
+        deadline: float | None = None,
+    ) -> SolutionSpec | None:
+        """Returns the first solution that uses only the pieces in `subset`, or None if there is none. Raises
+        SearchLimitReached once the search has selected `nodes` rows or time.monotonic() has passed `deadline`;
+        the next search starts over."""
+        solution = next(self.solver(subset).limit(nodes, deadline), None)
+        return None if solution is None else self.decode(solution)
+
+    def solve(
+        self,
+        workers: int | None = None,
+        ordered: bool = False,
+        first: bool = False,
+        subset: Collection[PieceSpec] | None = None,
+        pool: ProcessPoolExecutor | None = None,
+        depth: int = 2,
+    ) -> Iterator[SolutionSpec]:
+        """Iterates over the solutions that use only the pieces in `subset`, or any of the pieces if it is None.
+        With `workers`, the search is split across that many processes, those of `pool` if it is one from
+        solver_pool; see dlx_solver.solve_parallel for `ordered`, `first` and `depth`. Otherwise it runs on
+        NATIVE_ENGINE, unless the problem is single-pass, which needs a constraint."""
+        columns, rows, clues = self.matrix()
+        symmetry_piece = self._symmetry_piece(subset)
+        if workers is None:
+            solver = self.solver(subset, 'auto' if self._single_pass else NATIVE_ENGINE)
+        else:
+            solver = solve_parallel(
+                columns,
+                rows,
+                clues,
+                sparse=True,
+                excluded_columns=self.excluded_columns(subset),
+                constraint=self._constraint(),
+                workers=workers,
+                ordered=ordered,
+                # The first solution of a subtree may not be canonical, and another subtree's may be.
+                first=first and symmetry_piece is None,
+                pool=pool,
+                depth=depth,
+            )
         for solution in solver:
-            inv_row_mapping = {v: k for k, v in self._row_mapping.items()}
-            yield sorted(inv_row_mapping[i] for i in solution)
-
-
-def solve(
+            solution = self.decode(solution)
+            if symmetry_piece is None:
+                yield solution
+            elif is_canonical(self._group, solution, *symmetry_piece):
+                if self._symmetry == 'canonical':
+                    yield solution
+                else:
+                    yield from self._orbit(solution)
+
+    def solver_pool(self, workers: int | None = None) -> ProcessPoolExecutor:
+        """Returns a pool of `workers` processes that each hold a solver over the matrix of the problem, for
+        solve to search one subset after another without starting new processes; shut it down when done."""
+        columns, rows, _ = self.matrix()
+        return solver_pool(columns, rows, sparse=True, constraint=self._constraint(), workers=workers)
+
+    def _orbit(self, solution: SolutionSpec) -> Iterator[SolutionSpec]:
+        """Iterates over the orbit of the solution, with the hints named as given."""
+        identity = self._group[0]
+        hints = {identity.placement(hint): hint for hint in self._hints}
+        for image in orbit(self._group, solution):
+            yield sorted(hints.get(placement, placement) for placement in image)
+
+    def decode(self, solution: list[int]) -> SolutionSpec:
+        """Returns the placements of the rows of a solution from solver or solve_parallel, sorted."""
+        row_specs = self._row_specs
+        return sorted(row_specs[i] for i in solution)
+
+    def count(self, level_counts: list[int] | None = None, subset: Collection[PieceSpec] | None = None) -> int:
+        """Returns the number of solutions that use only the pieces in `subset`; see DlxSolver.count for
+        `level_counts`."""
+        if self._symmetry is not None:
+            raise ValueError("Solutions can only be counted without symmetry breaking")
+        return self.solver(subset).count(level_counts)
+
+
+def piece_subsets(
     shape: list[tuple[int, int, int, int]],
     pieces: Sequence[PieceSpec],
     hints: list[HintSpec] | None = None,
     tack_stitches: list | None = None,
-) -> Iterator[SolutionSpec]:
+    stats: dict[str, int] | None = None,
+) -> Iterator[list[PieceSpec] | None]:
+    """Iterates over the subsets of the pieces to solve for: the feasible ones if there are more pieces than
+    tiles, otherwise just None for all the pieces. See filter_pieces for `stats`."""
     pieces_ = pieces
     hints_ = hints or []
 
-    # @time_guard(timeout=1)  # timeout in seconds
     if len(pieces_) > len(shape):
         hint_pieces = [(pad, index) for (_, pad, index, _) in hints_]
         piece_subsets: Generator[tuple[PieceSpec], None, None] = filter_pieces(
@@ -251,35 +501,224 @@ def solve(
             pieces_,
             hints=hints_,
             tack_stitches=tack_stitches,
+            stats=stats,
         )
         for piece_subset in piece_subsets:
-            yield from Problem(
-                shape,
-                list(piece_subset) + hint_pieces,
-                hints_,
-                tack_stitches or []
-            ).solve()
+            yield list(piece_subset) + hint_pieces
     else:
-        yield from Problem(shape, pieces_, hints_, tack_stitches or []).solve()
+        yield None
 
 
-def solve_one(
+def solve(
     shape: list[tuple[int, int, int, int]],
     pieces: Sequence[PieceSpec],
     hints: list[HintSpec] | None = None,
     tack_stitches: list | None = None,
-) -> SolutionSpec:
+    workers: int | None = None,
+    ordered: bool = False,
+    single_pass: bool = False,
+    symmetry: str | None = None,
+    first: bool = False,
+    depth: int = 2,
+) -> Iterator[SolutionSpec]:
+    """Iterates over the solutions, or only the first one if `first` is set; see Problem for `single_pass` and
+    `symmetry`, and Problem.solve for `workers`, `ordered` and `depth`."""
+    # @time_guard(timeout=1)  # timeout in seconds
+    if single_pass:
+        problem = Problem(shape, pieces, hints or [], tack_stitches or [], single_pass=True)
+        yield from islice(problem.solve(workers, ordered, first, depth=depth), 1 if first else None)
+        return
+    # One exact cover matrix over all the pieces serves every subset, and one pool of workers over it; see
+    # Problem.solve.
+    problem = Problem(shape, pieces, hints or [], tack_stitches or [], symmetry=symmetry)
+    pool = None if workers is None else problem.solver_pool(workers)
+    try:
+        for subset in piece_subsets(shape, pieces, hints, tack_stitches):
+            for solution in problem.solve(workers, ordered, first, subset=subset, pool=pool, depth=depth):
+                yield solution
+                if first:
+                    return
+    finally:
+        if pool is not None:
+            shutdown_pool(pool)
+
+
+def solve_unique(
+    shape: list[tuple[int, int, int, int]],
+    pieces: Sequence[PieceSpec],
+    hints: list[HintSpec] | None = None,
+    tack_stitches: list | None = None,
+    workers: int | None = None,
+    ordered: bool = False,
+    single_pass: bool = False,
+    digest_size: int | None = None,
+) -> Iterator[SolutionSpec]:
+    """Iterates over the solutions that differ by more than a symmetry of the shape or a swap of pieces with the
+    same edges, one for each; see shape_symmetry.unique_solutions for `digest_size`."""
+    hints, tack_stitches = hints or [], tack_stitches or []
+    group = stabilizer(automorphisms(shape, compile_shape(shape, tack_stitches).slots), hints)
+    # Breaking the symmetry in the search leaves only the swaps of pieces for unique_solutions to drop.
+    symmetry = None if single_pass else 'canonical'
+    solutions = solve(shape, pieces, hints, tack_stitches, workers, ordered, single_pass, symmetry)
+    yield from unique_solutions(group, solutions, digest_size)
+
+
+def count_solutions(
+    shape: list[tuple[int, int, int, int]],
+    pieces: Sequence[PieceSpec],
+    hints: list[HintSpec] | None = None,
+    tack_stitches: list | None = None,
+    level_counts: list[int] | None = None,
+    single_pass: bool = False,
+) -> int:
+    """Returns the number of solutions that solve() would yield, without building them. If `level_counts` is
+    given, the number of rows tried at each level of the searches is added to it, which estimates how hard the
+    problem is."""
+    if single_pass:
+        return Problem(shape, pieces, hints or [], tack_stitches or [], single_pass=True).count(level_counts)
+    problem = Problem(shape, pieces, hints or [], tack_stitches or [])
+    return sum(problem.count(level_counts, subset) for subset in piece_subsets(shape, pieces, hints, tack_stitches))
+
 
-    @time_guard()
-    def _solve_one():
-        return next(solve(shape, pieces, hints, tack_stitches))
+def _luby(i: int) -> int:
+    """Returns term i, counted from 1, of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8, ..."""
+    while True:
+        k = i.bit_length()
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
 
-    for _ in range(6):
+
+class NoSolution(Exception):
+    """Raised by solve_one when the puzzle has no solution at all."""
+
+
+def solve_one(
+    shape: list[tuple[int, int, int, int]],
+    pieces: Sequence[PieceSpec],
+    hints: list[HintSpec] | None = None,
+    tack_stitches: list | None = None,
+    timeout: float = 6,
+) -> SolutionSpec:
+    """Returns a solution; raises NoSolution if there is none, or TimeoutError if none was found within `timeout`
+    seconds. The subsets of the pieces are searched in the order solve() takes them, on one Problem. The search of a
+    subset starts over with the rows in a new random order whenever it has selected RESTART_NODES rows times the
+    next term of the Luby sequence, so that an unlucky order cannot hold it up for long, however long the search
+    takes. A subset searched to the end is not searched again. The subsets are not reordered by how constrained
+    they look: DlxSolver.branching is the same for nearly all of them, while the rows selected to a first solution
+    vary widely (see bench/benchmarks.py subset-order)."""
+    deadline = monotonic() + timeout
+    problem = Problem(shape, pieces, hints or [], tack_stitches or [])
+    restart = 1
+    for subset in piece_subsets(shape, pieces, hints, tack_stitches):
+        while True:
+            try:
+                solution = problem.search(subset, _luby(restart) * RESTART_NODES, deadline)
+                break
+            except SearchLimitReached:
+                if monotonic() >= deadline:
+                    raise TimeoutError("Failed to solve within the allowed time") from None
+                problem.shuffle()
+                restart += 1
+        if solution is not None:
+            return solution
+    raise NoSolution("The puzzle has no solution")
+
+
+class BatchResult(NamedTuple):
+    index: int  # of the job in the jobs given to solve_batch
+    status: str  # 'solved', 'unsolvable', 'timeout' or 'error'
+    solution: SolutionSpec | None
+    error: str | None = None  # what solve_one raised, if the status is 'error'
+
+
+def _solve_jobs(jobs: list[tuple[int, tuple]], timeout: float) -> list[BatchResult]:
+    results = []
+    for index, job in jobs:
         try:
-            return _solve_one()
+            shape, pieces, *rest = job
+            result = BatchResult(index, 'solved', solve_one(shape, pieces, *rest, timeout=timeout))
+        except NoSolution:
+            result = BatchResult(index, 'unsolvable', None)
         except TimeoutError:
-            continue
-    raise TimeoutError("Failed to solve within the allowed attempts")
+            result = BatchResult(index, 'timeout', None)
+        except Exception as e:  # a malformed job only fails itself
+            result = BatchResult(index, 'error', None, f"{type(e).__name__}: {e}")
+        results.append(result)
+    return results
+
+
+def solve_batch(
+    jobs: Iterable[tuple],
+    workers: int | None = None,
+    timeout: float = 6,
+    chunk_size: int = 4,
+) -> Iterator[BatchResult]:
+    """Runs solve_one on every job, a tuple of the shape and the pieces and optionally the hints and the tack
+    stitches, in a pool of `workers` processes, and yields a BatchResult for each as chunks of jobs finish. A job
+    is unsolvable if it has no solution and times out if none was found within `timeout` seconds; a job that
+    solve_one rejects, such as one with conflicting hints, gets the status 'error' and the exception as a string.
+
+    The jobs are grouped by shape and tack stitches, and each chunk of up to `chunk_size` jobs on the same shape is
+    solved by one worker, so that they share what is cached for the shape."""
+    groups: dict[tuple, list[tuple[int, tuple]]] = {}
+    for index, job in enumerate(jobs):
+        try:
+            shape, _, *rest = job
+            tack_stitches = rest[1] if len(rest) > 1 else None
+            key = (tuple(map(tuple, shape)), tuple(map(tuple, tack_stitches or ())))
+        except Exception:  # a malformed job, which _solve_jobs reports
+            key = (index,)
+        groups.setdefault(key, []).append((index, job))
+    chunks = [group[i:i + chunk_size] for group in groups.values() for i in range(0, len(group), chunk_size)]
+    executor = ProcessPoolExecutor(max_workers=workers)
+    futures = [executor.submit(_solve_jobs, chunk, timeout) for chunk in chunks]
+    try:
+        for future in as_completed(futures):
+            yield from future.result()
+    finally:
+        shutdown_pool(executor, futures)
+
+
+_worker_pool: WorkerPool | None = None
+
+
+def worker_pool() -> WorkerPool:
+    """Returns the pool of worker processes that the async functions share unless they are given one, started on
+    first use with a worker per CPU, each of which has imported this module."""
+    global _worker_pool
+    if _worker_pool is None:
+        _worker_pool = WorkerPool(cpu_count() or 1, preload=['kata_part_3_solution'])
+    return _worker_pool
+
+
+async def solve_one_async(
+    shape: list[tuple[int, int, int, int]],
+    pieces: Sequence[PieceSpec],
+    hints: list[HintSpec] | None = None,
+    tack_stitches: list | None = None,
+    timeout: float = 6,
+    pool: WorkerPool | None = None,
+) -> SolutionSpec:
+    """Runs solve_one on a worker of `pool`, or of worker_pool(), without blocking the event loop, and returns or
+    raises what it does, NoSolution included. Cancelling the task kills the worker at once."""
+    return await (pool or worker_pool()).run_async(solve_one, shape, pieces, hints, tack_stitches, timeout)
+
+
+def solve_async(
+    shape: list[tuple[int, int, int, int]],
+    pieces: Sequence[PieceSpec],
+    hints: list[HintSpec] | None = None,
+    tack_stitches: list | None = None,
+    single_pass: bool = False,
+    symmetry: str | None = None,
+    pool: WorkerPool | None = None,
+) -> AsyncIterator[SolutionSpec]:
+    """Returns an async iterator over the solutions that solve() yields, searching on a worker of `pool`, or of
+    worker_pool(), without blocking the event loop. The search stays a little ahead of the caller; cancelling the
+    task or closing the iterator kills the worker."""
+    pool = pool or worker_pool()
+    return pool.stream_async(solve, shape, pieces, hints, tack_stitches, single_pass=single_pass, symmetry=symmetry)
 
 
 def timeout_handler(_signum: int, _frame: Any) -> None:
@@ -0,0 +1,182 @@
+"""Symmetries of shapes, used to search for one solution per class of symmetric solutions.
+
+An automorphism of a shape maps every tile to a tile and the positions on its edge to the positions on the edge of
+that tile, so that tiles that share a side go to tiles that share a side and cubits that share a slot go to
+cubits that share a slot. On each connected part of the shape it either keeps the clockwise order of the positions
+on every tile (a rotation) or reverses it on every tile (a reflection, for which pieces are turned over).
+"""
+from collections.abc import Iterable, Iterator
+from functools import cache
+from hashlib import blake2b
+from typing import NamedTuple
+
+from edge_tables import ORIENTATIONS, distinct_orientations, edge_mask
+from pads import PadsBase
+
+Placement = tuple[int, PadsBase, int, str]  # (tile, pad, index, orientation), as in a SolutionSpec
+
+_ORIENTATION_NAMES = {value: name for name, value in ORIENTATIONS.items()}
+
+
+class Automorphism(NamedTuple):
+    tiles: tuple[int, ...]  # tile t goes to tiles[t]
+    offsets: tuple[int, ...]  # position p of tile t goes to position (offsets[t] + directions[t] * p) % 16
+    directions: tuple[int, ...]  # 1 where the automorphism rotates, -1 where it reflects
+
+    def position(self, tile: int, position: int) -> tuple[int, int]:
+        return self.tiles[tile], (self.offsets[tile] + self.directions[tile] * position) % 16
+
+    def placement(self, placement: Placement) -> Placement:
+        """Returns where the piece goes, with the orientation named as in distinct_orientations."""
+        tile, pad, index, orientation = placement
+        direction, offset = ORIENTATIONS[orientation]
+        # Position j of the new tile holds position i = direction * (j - offsets[tile]) of the old one, which holds
+        # position offset + direction * i of the piece.
+        new_orientation = _ORIENTATION_NAMES[(
+            direction * self.directions[tile],
+            (offset - direction * self.directions[tile] * self.offsets[tile]) % 16,
+        )]
+        return self.tiles[tile], pad, index, canonical_orientation(pad, index, new_orientation)
+
+    def solution(self, solution: Iterable[Placement]) -> list[Placement]:
+        return sorted(self.placement(placement) for placement in solution)
+
+
+@cache
+def canonical_orientation(pad: PadsBase, index: int, orientation: str) -> str:
+    """Returns the first of the distinct orientations of the piece that gives it the same edge as `orientation`."""
+    mask = edge_mask(pad, index, orientation)
+    return next(o for o in distinct_orientations(pad, index) if edge_mask(pad, index, o) == mask)
+
+
+def automorphisms(shape: list[tuple[int, int, int, int]], slots: list[int]) -> list[Automorphism]:
+    """Returns the automorphisms of the connected part of the shape that holds tile 0, the identity first, as
+    automorphisms of the whole shape that leave the other parts as they are. That is the whole group for connected
+    shapes and a subgroup of it for the others, which keeps the number of automorphisms of shapes made of several
+    cubes small. `slots` maps the positions to the slots of the shape as get_shape_slots does, tack stitches
+    included."""
+    facing = [tuple(shape[neighbor].index(tile) for neighbor in neighbors) for tile, neighbors in enumerate(shape)]
+    group = []
+    for direction in (1, -1):
+        for image in range(len(shape)):
+            for rotation in range(4):
+                automorphism = _extend(shape, facing, direction, image, rotation)
+                if automorphism is not None and _keeps_slots(automorphism, slots):
+                    group.append(automorphism)
+    return group
+
+
+def _extend(
+    shape: list[tuple[int, int, int, int]],
+    facing: list[tuple[int, ...]],
+    direction: int,
+    image: int,
+    rotation: int,
+) -> Automorphism | None:
+    """Returns the automorphism that sends tile 0 to tile `image` and its side k to side rotation + direction * k,
+    if there is one."""
+    num_tiles = len(shape)
+    tiles, rotations = [-1] * num_tiles, [0] * num_tiles
+    tiles[0], rotations[0] = image, rotation
+    queue = [0]
+    for tile in queue:
+        for side, neighbor in enumerate(shape[tile]):
+            new_side = (rotations[tile] + direction * side) % 4
+            new_neighbor = shape[tiles[tile]][new_side]
+            new_rotation = (facing[tiles[tile]][new_side] - direction * facing[tile][side]) % 4
+            if tiles[neighbor] == -1:
+                tiles[neighbor], rotations[neighbor] = new_neighbor, new_rotation
+                queue.append(neighbor)
+            elif (tiles[neighbor], rotations[neighbor]) != (new_neighbor, new_rotation):
+                return None
+    directions = [direction if t != -1 else 1 for t in tiles]
+    tiles = [t if t != -1 else i for i, t in enumerate(tiles)]
+    if len(set(tiles)) != num_tiles:
+        return None
+    # Side k spans positions 4k to 4k + 4; reversing the order of the positions also reverses each side.
+    offsets = tuple((4 * r if d == 1 else 4 * r + 4) % 16 for r, d in zip(rotations, directions))
+    return Automorphism(tuple(tiles), offsets, tuple(directions))
+
+
+def _keeps_slots(automorphism: Automorphism, slots: list[int]) -> bool:
+    image = {}
+    for p, slot in enumerate(slots):
+        tile, position = automorphism.position(*divmod(p, 16))
+        if image.setdefault(slot, slots[16 * tile + position]) != slots[16 * tile + position]:
+            return False
+    return len(set(image.values())) == len(image)
+
+
+def _canonical(solution: Iterable[Placement]) -> list[Placement]:
+    return sorted((tile, pad, index, canonical_orientation(pad, index, o)) for tile, pad, index, o in solution)
+
+
+def stabilizer(group: Iterable[Automorphism], placements: Iterable[Placement]) -> list[Automorphism]:
+    """Returns the automorphisms that leave each of the placements where it is."""
+    placements = [(tile, pad, index, canonical_orientation(pad, index, o)) for tile, pad, index, o in placements]
+    return [g for g in group if all(g.placement(placement) == placement for placement in placements)]
+
+
+def canonical_placements(group: list[Automorphism], num_tiles: int, pad: PadsBase, index: int) -> set[Placement]:
+    """Returns one placement of the piece per orbit of the group: the first in the order of the tiles and of the
+    distinct orientations."""
+    representatives, seen = set(), set()
+    for tile in range(num_tiles):
+        for orientation in distinct_orientations(pad, index):
+            placement = (tile, pad, index, orientation)
+            if placement not in seen:
+                representatives.add(placement)
+                seen.update(g.placement(placement) for g in group)
+    return representatives
+
+
+def is_canonical(group: list[Automorphism], solution: list[Placement], pad: PadsBase, index: int) -> bool:
+    """Returns whether the solution, in which the piece has a canonical placement, is the least of the solutions
+    in its orbit that also have it there. Together with the canonical placements this picks one solution per
+    orbit."""
+    placement = next(p for p in solution if p[1:3] == (pad, index))
+    solution = _canonical(solution)
+    return all(solution <= g.solution(solution) for g in stabilizer(group, [placement]))
+
+
+def orbit(group: Iterable[Automorphism], solution: list[Placement]) -> Iterator[list[Placement]]:
+    """Iterates over the distinct solutions that the group makes of the solution, the solution first. The others
+    name orientations as distinct_orientations does."""
+    yield solution
+    seen = {tuple(_canonical(solution))}
+    for g in group:
+        image = g.solution(solution)
+        if tuple(image) not in seen:
+            seen.add(tuple(image))
+            yield image
+
+
+def solution_key(group: Iterable[Automorphism], solution: Iterable[Placement]) -> bytes:
+    """Returns a key that is the same for two solutions exactly when an automorphism maps the edges on the tiles of
+    one to those of the other, so solutions that only swap pieces with the same edges also share it. It is the
+    least over the group of the edge masks in the order of the tiles, two bytes per tile."""
+    solution = list(solution)
+    return min(_edges(g.placement(placement) for placement in solution) for g in group)
+
+
+def _edges(solution: Iterable[Placement]) -> bytes:
+    masks = sorted((tile, edge_mask(pad, index, orientation)) for tile, pad, index, orientation in solution)
+    return b''.join(mask.to_bytes(2, 'little') for _, mask in masks)
+
+
+def unique_solutions(
+    group: list[Automorphism],
+    solutions: Iterable[list[Placement]],
+    digest_size: int | None = None,
+) -> Iterator[list[Placement]]:
+    """Iterates over the solutions, skipping those with the key of one seen before; see solution_key. Only the keys
+    are kept, or if `digest_size` is given their hashes of that many bytes, which bounds the memory per solution
+    for large shapes at the cost of a small chance of dropping a solution whose hash collides."""
+    seen = set()
+    for solution in solutions:
+        key = solution_key(group, solution)
+        if digest_size is not None:
+            key = blake2b(key, digest_size=digest_size).digest()
+        if key not in seen:
+            seen.add(key)
+            yield solution
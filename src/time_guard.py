@@ -1,8 +1,17 @@
+import asyncio
 import multiprocessing
+import multiprocessing.connection
 import multiprocessing.queues
-from collections.abc import Callable
+import pickle
+from collections.abc import AsyncIterator, Callable, Iterable
+from contextlib import asynccontextmanager
 from functools import wraps
+from importlib import import_module
+from queue import SimpleQueue
 from typing import Any
+from weakref import WeakKeyDictionary
+
+_in_pool_worker = False
 
 
 def _worker(
@@ -17,13 +26,172 @@ def _worker(
         q.put(('err', e))
 
 
-def time_guard(timeout: int = 1) -> Callable[[Callable], Callable]:
+def _serve(conn: multiprocessing.connection.Connection, preload: list[str]) -> None:
+    global _in_pool_worker
+    _in_pool_worker = True
+    for name in preload:
+        import_module(name)
+    while True:
+        try:
+            payload = conn.recv_bytes()
+        except EOFError:
+            return
+        try:
+            f, args, kwargs, stream = pickle.loads(payload)
+            if stream:
+                for item in f(*args, **kwargs):
+                    conn.send_bytes(pickle.dumps(('item', item)))
+                result = ('ok', None)
+            else:
+                result = ('ok', f(*args, **kwargs))
+        except Exception as e:
+            result = ('err', e)
+        try:
+            conn.send_bytes(pickle.dumps(result))
+        except (pickle.PicklingError, AttributeError, TypeError) as e:
+            conn.send_bytes(pickle.dumps(('err', e)))
+
+
+async def _receive(conn: multiprocessing.connection.Connection) -> tuple[str, Any]:
+    loop = asyncio.get_running_loop()
+    readable = loop.create_future()
+    loop.add_reader(conn.fileno(), lambda: readable.done() or readable.set_result(None))
+    try:
+        await readable
+    finally:
+        loop.remove_reader(conn.fileno())
+    return pickle.loads(conn.recv_bytes())
+
+
+class WorkerPool:
+    """Worker processes started in advance that run calls for time_guard and for coroutines. The workers come from
+    a fork server, or are spawned where there is none, so they share no threads, sockets or locks with the caller,
+    which may be an event loop; each imports the modules named in `preload` when it starts. A call only costs
+    sending the function and its arguments to a worker and the result back, by pickle, so the function must be one
+    a worker can import by name. A worker that times out or whose call is cancelled is killed and replaced by a
+    fresh one. Use the pool as a context manager or close it, which kills the workers.
+
+    Calls from threads wait for an idle worker; coroutines wait their turn without blocking the event loop, one
+    event loop after another. Don't mix the two, or run coroutines on two loops at once, on one pool, or a coroutine
+    may find every worker taken."""
+
+    def __init__(self, workers: int = 1, preload: Iterable[str] = ()) -> None:
+        methods = multiprocessing.get_all_start_methods()
+        self._ctx = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        self._preload = list(preload)
+        self._idle: SimpleQueue[tuple[multiprocessing.Process, multiprocessing.connection.Connection]] = SimpleQueue()
+        self._workers: set[multiprocessing.Process] = set()
+        self._size = workers
+        # A semaphore is bound to the event loop that first waits on it, so every loop gets its own.
+        self._slots: WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = WeakKeyDictionary()
+        for _ in range(workers):
+            self._idle.put(self._start())
+
+    def _start(self) -> tuple[multiprocessing.Process, multiprocessing.connection.Connection]:
+        conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(target=_serve, args=(child_conn, self._preload), daemon=True)
+        process.start()
+        child_conn.close()
+        self._workers.add(process)
+        return process, conn
+
+    def _stop(self, process: multiprocessing.Process, conn: multiprocessing.connection.Connection) -> None:
+        conn.close()
+        process.terminate()
+        process.join()
+        self._workers.discard(process)
+
+    def run(self, timeout: float, f: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+        """Calls f on the next idle worker, waiting for one if need be, and returns what it returns or raises what
+        it raises; raises TimeoutError if it takes over `timeout` seconds."""
+        payload = pickle.dumps((f, args, kwargs, False))
+        process, conn = self._idle.get()
+        try:
+            conn.send_bytes(payload)
+            if not conn.poll(timeout):
+                raise TimeoutError()
+            status, val = pickle.loads(conn.recv_bytes())
+        except BaseException:
+            self._stop(process, conn)
+            self._idle.put(self._start())
+            raise
+        self._idle.put((process, conn))
+        if status == 'err':
+            raise val
+        return val
+
+    @asynccontextmanager
+    async def _worker(self) -> AsyncIterator[multiprocessing.connection.Connection]:
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self._size)
+        async with slots:
+            process, conn = self._idle.get_nowait()
+            try:
+                yield conn
+            except BaseException:
+                self._stop(process, conn)
+                self._idle.put(self._start())
+                raise
+            self._idle.put((process, conn))
+
+    async def run_async(self, f: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+        """Calls f on the next idle worker, as run does but without a timeout, and returns what it returns or raises
+        what it raises. Cancelling the task kills the worker."""
+        payload = pickle.dumps((f, args, kwargs, False))
+        async with self._worker() as conn:
+            conn.send_bytes(payload)
+            status, val = await _receive(conn)
+        if status == 'err':
+            raise val
+        return val
+
+    async def stream_async(self, f: Callable[..., Any], /, *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        """Calls f, which must return an iterable, on the next idle worker and iterates over what it yields as the
+        worker yields it, then raises what f raised, if anything. The worker runs ahead of the caller by no more
+        than the pipe holds. Cancelling the task or closing the iterator before the end kills the worker."""
+        payload = pickle.dumps((f, args, kwargs, True))
+        async with self._worker() as conn:
+            conn.send_bytes(payload)
+            while (message := await _receive(conn))[0] == 'item':
+                yield message[1]
+        status, val = message
+        if status == 'err':
+            raise val
+
+    def close(self) -> None:
+        while not self._idle.empty():
+            self._idle.get()[1].close()
+        for process in list(self._workers):
+            process.terminate()
+            process.join()
+        self._workers.clear()
+
+    def __enter__(self) -> 'WorkerPool':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def time_guard(timeout: int = 1, pool: WorkerPool | None = None) -> Callable[[Callable], Callable]:
     """A decorator that raises a TimeoutError after `timeout` seconds unless the
-    decorated function hasn't already returned."""
+    decorated function hasn't already returned. Every call runs in a process of its
+    own, or on a worker of `pool` if one is given."""
 
     def decorator(f: Callable):
         @wraps(f)
         def wrapper(*args, **kwargs):
+            if pool is not None:
+                if _in_pool_worker:
+                    return f(*args, **kwargs)
+                try:
+                    pickle.dumps(f)
+                except (pickle.PicklingError, AttributeError):
+                    # The name of the function is bound to this wrapper, which a worker calls as f.
+                    return pool.run(timeout, wrapper, *args, **kwargs)
+                return pool.run(timeout, f, *args, **kwargs)
             ctx = multiprocessing.get_context('fork')
             q = ctx.Queue()
             p = ctx.Process(target=_worker, args=(q, f, args, kwargs))
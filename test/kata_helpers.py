@@ -0,0 +1,81 @@
+"""Helpers shared by the test modules."""
+import sys
+from enum import Enum
+from itertools import chain
+from pathlib import Path
+from random import randrange, shuffle
+
+SRC = Path(__file__).parent.parent / 'src'
+
+sys.path.append(str(SRC))
+
+from kata_part_3_solution import HintSpec
+from pads import PadsBase
+
+
+class Orientations(Enum):
+    R0 = (1, 0)
+    R1 = (1, 12)
+    R2 = (1, 8)
+    R3 = (1, 4)
+    F0 = (-1, 4)
+    F1 = (-1, 8)
+    F2 = (-1, 12)
+    F3 = (-1, 0)
+
+    def __init__(self, direction: int, offset: int):
+        self._direction = direction
+        self._offset = offset
+        self._indexes = [(offset + direction * i) % 16 for i in range(16)]
+
+    def apply(self, edge: list[int]):
+        return (edge[i] for i in self._indexes)
+
+    def rotate(self, k):
+        sign = self._direction
+        return Orientations((sign, (self._offset - sign * k * 4) % 16))
+
+
+def get_edge(pad_: PadsBase, index_: int, orientation_str_: str) -> list[int]:
+    """Returns the edge of the piece with given index of given pad"""
+    c = str(index_)
+    lines = pad_.value.splitlines()
+    row_min = next(i for i, row in enumerate(lines) if c in row)
+    row_max = row_min + 4
+    col_min = 100
+    for i, row in enumerate(lines[row_min: row_max + 1], start=row_min):
+        col_start = next(j for j, v in enumerate(row) if v == c)
+        col_min = min(col_min, col_start)
+    col_max = col_min + 4
+    edge = list(chain(
+        (int(lines[row_min][i] == c) for i in range(col_min, col_max)),
+        (int(lines[i][col_max] == c) for i in range(row_min, row_max)),
+        (int(lines[row_max][i] == c) for i in range(col_max, col_min, -1)),
+        (int(lines[i][col_min] == c) for i in range(row_max, row_min, -1)),
+    ))
+    return list(Orientations[orientation_str_].apply(edge))
+
+
+def shape_shuffle(
+    shape: list[tuple[int, int, int, int]],
+    hints: list[tuple[int, str, int, str]] | None = None,
+) -> tuple[list[tuple[int, int, int, int]], list[HintSpec]]:
+    hints = hints or []
+    num_tiles = len(shape)
+    permutation = list(range(num_tiles))
+    shuffle(permutation)
+    res = {}
+    for tile, neighbors in enumerate(shape):
+        res[permutation[tile]] = tuple(permutation[j] for j in neighbors)
+    hints_map = {permutation[tile]: (color, index, orientation_str)
+                 for tile, color, index, orientation_str in hints}
+    for tile, neighbors in res.items():
+        k = randrange(4)
+        if k > 0:
+            res[tile] = tuple(neighbors[(j + k) % 4] for j in range(4))
+            if tile in hints_map:
+                color, index, orientation_str = hints_map[tile]
+                orientation = Orientations[orientation_str].rotate(-k)
+                hints_map[tile] = (color, index, orientation.name)
+    # noinspection PyTypeChecker
+    return [res[i] for i in range(num_tiles)], [(i, *rest) for i, rest in hints_map.items()]
@@ -0,0 +1,113 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).parent.parent / 'src'
+
+sys.path.append(str(SRC))
+
+from compiled_shape import compile_shape, slot_partition
+from shapes import Shapes
+
+
+@pytest.mark.parametrize('shape', list(Shapes))
+def test_compile_shape(shape: Shapes):
+    compiled = compile_shape(shape.value)
+    num_positions = 16 * len(shape.value)
+    assert compiled.num_tiles == len(shape.value)
+    # Every slot is named after a position in it and numbered in the order of the first position in it.
+    assert all(compiled.slots[root] == root for root in compiled.slots)
+    assert sorted(set(compiled.dense_slots)) == list(range(compiled.num_slots))
+    first = {}
+    for p in range(num_positions):
+        first.setdefault(compiled.dense_slots[p], p)
+        assert compiled.slots[p] == compiled.slots[first[compiled.dense_slots[p]]]
+    assert list(first) == list(range(compiled.num_slots))
+    assert len(set(compiled.slots)) == compiled.num_slots
+    assert compiled.corner_slots == {compiled.dense_slots[p] for p in range(0, num_positions, 4)}
+    assert [slot for slots in compiled.tile_slots for slot in slots] == list(compiled.dense_slots)
+    assert compiled.sides_paired
+    assert compile_shape([list(tile) for tile in shape.value]) is compiled  # from the cache
+
+
+def test_tack_stitches():
+    shape = Shapes.CUBE_1x1x1.value
+    compiled = compile_shape(shape)
+    assert (compiled.num_slots, len(compiled.corner_slots)) == (8 + 12 * 3, 8)
+    stitched = compile_shape(shape, [(0 * 16 + 2, 5 * 16 + 2)])
+    assert stitched is not compiled
+    assert stitched.num_slots == compiled.num_slots - 1
+    assert stitched.dense_slots[0 * 16 + 2] == stitched.dense_slots[5 * 16 + 2]
+    assert not stitched.sides_paired
+
+
+def torus(rows: int, columns: int) -> list[tuple[int, int, int, int]]:
+    """Returns a synthetic shape of rows * columns tiles whose opposite sides are joined, like a torus."""
+    return [
+        (
+            (r - 1) % rows * columns + c,
+            r * columns + (c + 1) % columns,
+            (r + 1) % rows * columns + c,
+            r * columns + (c - 1) % columns,
+        )
+        for r in range(rows)
+        for c in range(columns)
+    ]
+
+
+def reference_slots(tiles, tack_stitches=()) -> list[int]:
+    """The union-find that get_shape_slots has always used, for comparison."""
+    res = list(range(len(tiles) * 16))
+
+    def find(i):
+        while res[i] != i:
+            i = res[i]
+        return i
+
+    pairs = [
+        (16 * tile1 + (4 * edge1 + i) % 16, 16 * tile2 + (4 * tiles[tile2].index(tile1) + 4 - i) % 16)
+        for tile1, neighbors in enumerate(tiles)
+        for edge1, tile2 in enumerate(neighbors)
+        if tile2 > tile1
+        for i in range(5)
+    ]
+    for i, j in [*pairs, *tack_stitches]:
+        i, j = find(i), find(j)
+        if i != j:
+            res[i] = j
+    return [find(i) for i in range(len(res))]
+
+
+@pytest.mark.parametrize('tiles, tack_stitches', [
+    *((shape.value, []) for shape in Shapes),
+    (Shapes.THREE_STEPS.value, [(128, 308), (2, 40)]),
+    (torus(40, 50), [(0, 16 * 999 + 6)]),
+    (torus(40, 50), [(16 * tile + 2, 16 * (tile + 1) + 2) for tile in range(1999)]),  # a slot across every tile
+])
+def test_slots_unchanged(tiles, tack_stitches):
+    compiled = compile_shape(tiles, tack_stitches)
+    assert list(compiled.slots) == reference_slots(tiles, tack_stitches)
+    if len(tack_stitches) == 1 and len(tiles) > 100:
+        # A torus has as many corners as tiles and twice as many sides, with three slots between the corners each.
+        assert compiled.num_slots == 7 * len(tiles) - 1
+    np = pytest.importorskip('numpy')
+    assert np.array_equal(slot_partition(tiles, tack_stitches), compiled.dense_slots)
+
+
+def test_row_template():
+    compiled = compile_shape(Shapes.PRISM_1x1x2.value)
+    for tile in range(compiled.num_tiles):
+        for mask in (0x1111, 0x0F0F, 0xFFFF):
+            template = compiled.row_template(tile, mask)
+            assert template == tuple(sorted({compiled.dense_slots[16 * tile + i] for i in range(16) if mask >> i & 1}))
+            assert compiled.row_template(tile, mask) is template
+    assert compile_shape(Shapes.PRISM_1x1x2.value).row_template(0, 0x1111) is compiled.row_template(0, 0x1111)
+
+
+def test_compiled_shape_is_a_value():
+    compiled = compile_shape(Shapes.PRISM_1x1x2.value)
+    compiled.row_template(0, 0x1111)
+    copy = compiled._replace()
+    assert copy is not compiled and copy == compiled and hash(copy) == hash(compiled)
+    assert copy.row_template(0, 0x1111) is compiled.row_template(0, 0x1111)  # the cache is not in the value
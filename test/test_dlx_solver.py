@@ -0,0 +1,363 @@
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from random import Random
+from time import monotonic
+
+import pytest
+
+SRC = Path(__file__).parent.parent / 'src'
+
+sys.path.append(str(SRC))
+
+from dlx_solver import (
+    DlxSolver,
+    ArrayDlxSolver,
+    BitsetDlxSolver,
+    NodeDlxSolver,
+    SearchLimitReached,
+    shutdown_pool,
+    solve_parallel,
+    solver_pool,
+)
+
+ENGINES = ['array', 'nodes', 'bitset']
+
+# Knuth's example from "Dancing Links": the only solution consists of rows 0, 3 and 4.
+COLUMNS = [True] * 7
+ROWS = [
+    [0, 0, 1, 0, 1, 1, 0],
+    [1, 0, 0, 1, 0, 0, 1],
+    [0, 1, 1, 0, 0, 1, 0],
+    [1, 0, 0, 1, 0, 0, 0],
+    [0, 1, 0, 0, 0, 0, 1],
+    [0, 0, 0, 1, 1, 0, 1],
+]
+
+
+def random_problem(seed: int) -> tuple[list[bool], list[list[int]]]:
+    rnd = Random(seed)
+    num_columns = rnd.randrange(4, 12)
+    columns = [rnd.random() < 0.8 for _ in range(num_columns)]
+    rows = [[int(rnd.random() < 0.3) for _ in range(num_columns)] for _ in range(rnd.randrange(5, 40))]
+    return columns, [row for row in rows if any(row)]
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_knuth_example(engine):
+    solutions = list(DlxSolver(COLUMNS, ROWS, engine=engine))
+    assert [sorted(solution) for solution in solutions] == [[0, 3, 4]]
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_clues(engine):
+    assert [sorted(s) for s in DlxSolver(COLUMNS, ROWS, clues=[3], engine=engine)] == [[0, 3, 4]]
+    assert list(DlxSolver(COLUMNS, ROWS, clues=[1], engine=engine)) == []
+
+
+def test_engine_selection():
+    assert isinstance(DlxSolver(COLUMNS, ROWS), BitsetDlxSolver)
+    assert isinstance(DlxSolver(columns=COLUMNS, rows=ROWS), BitsetDlxSolver)
+    assert isinstance(DlxSolver(COLUMNS, rows=ROWS), BitsetDlxSolver)
+    assert isinstance(DlxSolver(COLUMNS, ROWS, None, 'nodes'), NodeDlxSolver)
+    assert isinstance(DlxSolver(COLUMNS, rows=ROWS, engine='array'), ArrayDlxSolver)
+    assert isinstance(DlxSolver(COLUMNS, iter(ROWS)), ArrayDlxSolver)
+    assert isinstance(DlxSolver([True] * 3000, [[i] for i in range(3000)], sparse=True), ArrayDlxSolver)
+    assert isinstance(DlxSolver(COLUMNS, ROWS, engine='array'), ArrayDlxSolver)
+    assert isinstance(DlxSolver(COLUMNS, ROWS, engine='nodes'), NodeDlxSolver)
+    assert isinstance(DlxSolver(COLUMNS, ROWS, engine='bitset'), BitsetDlxSolver)
+    with pytest.raises(ValueError):
+        DlxSolver(COLUMNS, ROWS, engine='bogus')
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_engines_agree(seed):
+    columns, rows = random_problem(seed)
+    expected = list(DlxSolver(columns, rows, engine='nodes'))
+    assert all(list(DlxSolver(columns, rows, engine=engine)) == expected for engine in ENGINES)
+
+
+def to_sparse(rows: list[list[int]]) -> list[list[int]]:
+    return [[i for i, v in enumerate(row) if v] for row in rows]
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('seed', range(10))
+def test_sparse_rows(engine, seed):
+    columns, rows = random_problem(seed)
+    expected = list(DlxSolver(columns, rows, engine=engine))
+    assert list(DlxSolver(columns, to_sparse(rows), engine=engine, sparse=True)) == expected
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_from_csr(engine):
+    sparse_rows = to_sparse(ROWS)
+    indptr = [0]
+    for row in sparse_rows:
+        indptr.append(indptr[-1] + len(row))
+    indices = [i for row in sparse_rows for i in row]
+    solutions = list(DlxSolver.from_csr(COLUMNS, indptr, indices, engine=engine))
+    assert [sorted(solution) for solution in solutions] == [[0, 3, 4]]
+    solutions = list(DlxSolver.from_csr(COLUMNS, array('q', indptr), array('i', indices), engine=engine))
+    assert [sorted(solution) for solution in solutions] == [[0, 3, 4]]
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_from_csr_numpy(engine):
+    np = pytest.importorskip('numpy')
+    sparse_rows = to_sparse(ROWS)
+    indptr = np.cumsum([0] + [len(row) for row in sparse_rows])
+    indices = np.concatenate([np.array(row, dtype=np.int64) for row in sparse_rows])
+    solutions = list(DlxSolver.from_csr(np.ones(7, dtype=bool), indptr, indices, engine=engine))
+    assert [sorted(solution) for solution in solutions] == [[0, 3, 4]]
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_search_deeper_than_recursion_limit(engine):
+    num_columns = sys.getrecursionlimit() + 100
+    rows = [[i] for i in range(num_columns)]
+    solutions = list(DlxSolver([True] * num_columns, rows, engine=engine, sparse=True))
+    assert [sorted(solution) for solution in solutions] == [list(range(num_columns))]
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_pause_and_resume(engine):
+    columns, rows = random_problem(3)
+    expected = list(DlxSolver(columns, rows, engine=engine))
+    assert len(expected) > 2
+    solver = DlxSolver(columns, rows, engine=engine)
+    head = [next(solver), next(solver)]
+    assert head + list(solver) == expected
+    assert list(solver) == []
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_conflicting_clues(engine):
+    with pytest.raises(ValueError, match='Clue 3 conflicts with clue 1'):
+        next(DlxSolver(COLUMNS, ROWS, clues=[1, 3], engine=engine))
+    with pytest.raises(ValueError):
+        next(DlxSolver(COLUMNS, ROWS, clues=[0, 0], engine=engine))
+    with pytest.raises(IndexError):
+        next(DlxSolver(COLUMNS, ROWS, clues=[len(ROWS)], engine=engine))
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_empty_rows(engine):
+    rows = [[0] * 7, *ROWS]
+    assert [sorted(s) for s in DlxSolver(COLUMNS, rows, clues=[4], engine=engine)] == [[1, 4, 5]]
+    with pytest.raises(ValueError):
+        next(DlxSolver(COLUMNS, rows, clues=[0], engine=engine))
+
+
+def many_solutions_problem() -> tuple[list[bool], list[list[int]]]:
+    # Tile a strip of 12 cells with pieces of length 1, 2 and 3.
+    num_cells = 12
+    rows = [list(range(i, i + n)) for n in (1, 2, 3) for i in range(num_cells - n + 1)]
+    return [True] * num_cells, rows
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('depth', [0, 1, 3])
+def test_prefixes(engine, depth):
+    columns, rows = many_solutions_problem()
+    expected = list(DlxSolver(columns, rows, sparse=True, engine=engine))
+    prefixes = list(DlxSolver(columns, rows, clues=[0], sparse=True, engine=engine).prefixes(depth))
+    assert all(prefix[0] == 0 and len(prefix) <= depth + 1 for prefix in prefixes)
+    solutions = [s for prefix in prefixes for s in DlxSolver(columns, rows, prefix, sparse=True, engine=engine)]
+    assert solutions == [s for s in expected if 0 in s]
+
+
+@pytest.mark.parametrize('ordered', [False, True])
+def test_solve_parallel(ordered):
+    columns, rows = many_solutions_problem()
+    expected = list(DlxSolver(columns, rows, sparse=True))
+    solutions = list(solve_parallel(columns, rows, sparse=True, workers=2, ordered=ordered))
+    if ordered:
+        assert solutions == expected
+    else:
+        assert sorted(solutions) == sorted(expected)
+
+
+def test_solve_parallel_first():
+    columns, rows = many_solutions_problem()
+    expected = list(DlxSolver(columns, rows, sparse=True))
+    solutions = list(solve_parallel(columns, rows, sparse=True, workers=2, first=True))
+    assert len(solutions) == 1 and solutions[0] in expected
+    assert list(solve_parallel(columns, rows, sparse=True, workers=2, ordered=True, first=True)) == expected[:1]
+    assert list(solve_parallel(COLUMNS, ROWS, clues=[1], workers=2, first=True)) == []
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_count(engine):
+    columns, rows = many_solutions_problem()
+    expected = list(DlxSolver(columns, rows, sparse=True, engine=engine))
+    assert DlxSolver(columns, rows, sparse=True, engine=engine).count() == len(expected)
+    level_counts = []
+    assert DlxSolver(columns, rows, sparse=True, engine=engine).count(level_counts) == len(expected)
+    assert level_counts[0] == 3 and len(level_counts) == 12
+    solver = DlxSolver(columns, rows, sparse=True, engine=engine)
+    next(solver)
+    assert solver.count() == len(expected) - 1
+    assert DlxSolver(COLUMNS, ROWS, clues=[1], engine=engine).count() == 0
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_branching(engine):
+    assert DlxSolver(COLUMNS, ROWS, engine=engine).branching() == 2
+    assert DlxSolver(COLUMNS, ROWS, clues=[3], engine=engine).branching() == 1
+    assert DlxSolver(COLUMNS, ROWS, clues=[0, 3, 4], engine=engine).branching() is None
+    assert DlxSolver(COLUMNS, ROWS, excluded_columns=[2], engine=engine).branching() == 0
+    solver = DlxSolver(COLUMNS, ROWS, engine=engine)
+    solver.restart([3])
+    assert solver.branching() == 1
+    assert [sorted(s) for s in solver] == [[0, 3, 4]]
+
+
+def without_column(columns: list[bool], rows: list[list[int]], column: int) -> tuple[list[bool], list[list[int]]]:
+    # The same problem with `column` made optional and the rows covering it emptied.
+    columns = [covered and i != column for i, covered in enumerate(columns)]
+    return columns, [[0] * len(row) if row[column] else row for row in rows]
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('seed', range(10))
+def test_excluded_columns(engine, seed):
+    columns, rows = random_problem(seed)
+    column = seed % len(columns)
+    expected = sorted(DlxSolver(*without_column(columns, rows, column), engine=engine))
+    assert sorted(DlxSolver(columns, rows, excluded_columns=[column], engine=engine)) == expected
+    with pytest.raises(ValueError, match='covers excluded column'):
+        next(DlxSolver(COLUMNS, ROWS, clues=[3], excluded_columns=[0], engine=engine))
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_restart(engine):
+    columns, rows = random_problem(3)
+    solver = DlxSolver(columns, rows, engine=engine)
+    next(solver)
+    for column in range(len(columns)):
+        solver.restart(excluded_columns=[column])
+        expected = sorted(DlxSolver(*without_column(columns, rows, column), engine=engine))
+        assert sorted(solver) == expected
+    solver.restart()
+    assert list(solver) == list(DlxSolver(columns, rows, engine=engine))
+    solver = DlxSolver(COLUMNS, ROWS, clues=[1], engine=engine)
+    assert list(solver) == []
+    solver.restart([3])
+    assert [sorted(s) for s in solver] == [[0, 3, 4]]
+
+
+class MaxRows:
+    """Allows at most `limit` selected rows."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.rows = []
+
+    def push(self, row_idx: int) -> bool:
+        self.rows.append(row_idx)
+        return len(self.rows) <= self.limit
+
+    def pop(self, row_idx: int) -> None:
+        assert self.rows.pop() == row_idx
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('limit', [0, 4, 6, 12])
+def test_constraint(engine, limit):
+    columns, rows = many_solutions_problem()
+    expected = [s for s in DlxSolver(columns, rows, sparse=True, engine=engine) if len(s) <= limit]
+    constraint = MaxRows(limit)
+    solver = DlxSolver(columns, rows, sparse=True, engine=engine, constraint=constraint)
+    assert list(solver) == expected
+    assert constraint.rows == []
+    solver.restart([0, 1])
+    assert solver.count() == sum(1 for s in expected if s[:2] == [0, 1])
+    solver.restart()
+    assert constraint.rows == []
+
+
+@pytest.mark.parametrize('ordered', [False, True])
+def test_solve_parallel_constraint(ordered):
+    columns, rows = many_solutions_problem()
+    expected = [s for s in DlxSolver(columns, rows, sparse=True) if len(s) <= 5]
+    solutions = list(solve_parallel(columns, rows, sparse=True, constraint=MaxRows(5), workers=2, ordered=ordered))
+    assert sorted(solutions) == sorted(expected)
+
+
+def test_solver_pool():
+    columns, rows = many_solutions_problem()
+    pool = solver_pool(columns, rows, sparse=True, constraint=MaxRows(5), workers=2)
+    try:
+        # Every worker restarts the one solver it holds for each subtree, of each search.
+        for clues, excluded_columns in [(None, ()), ([0], ()), (None, [0]), (None, ())]:
+            solver = DlxSolver(columns, rows, clues, sparse=True, excluded_columns=excluded_columns)
+            expected = [s for s in solver if len(s) <= 5]
+            solutions = solve_parallel(
+                columns, rows, clues, sparse=True, excluded_columns=excluded_columns, constraint=MaxRows(5), pool=pool
+            )
+            assert sorted(solutions) == sorted(expected)
+        assert len(list(solve_parallel(columns, rows, sparse=True, constraint=MaxRows(5), first=True, pool=pool))) == 1
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.parametrize('finished', [False, True])
+def test_shutdown_pool(finished):
+    pool = ProcessPoolExecutor(max_workers=1)
+    futures = [pool.submit(abs, -1)]
+    if finished:
+        assert futures[0].result() == 1
+    shutdown_pool(pool, futures if finished else None)
+    with pytest.raises(RuntimeError):
+        pool.submit(abs, -1)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_limit(engine):
+    columns, rows = many_solutions_problem()
+    expected = list(DlxSolver(columns, rows, sparse=True, engine=engine))
+    solver = DlxSolver(columns, rows, sparse=True, engine=engine)
+    solutions = []
+    for _ in range(1000):
+        try:
+            solutions.extend(solver.limit(nodes=7))
+            break
+        except SearchLimitReached:
+            pass
+    assert solutions == expected
+    assert solver.nodes > 7 * 10
+    solver.restart()
+    assert list(solver) == expected  # no limits after restart
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_deadline(engine):
+    columns, rows = many_solutions_problem()
+    expected = list(DlxSolver(columns, rows, sparse=True, engine=engine))
+    solver = DlxSolver(columns, rows, sparse=True, engine=engine)
+    head = [next(solver)]
+    with pytest.raises(SearchLimitReached):
+        list(solver.limit(deadline=monotonic()))
+    assert head + list(solver.limit()) == expected
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_rust_engine(seed):
+    pytest.importorskip('rust_dlx_lib')
+    columns, rows = random_problem(seed)
+    column = seed % len(columns)
+    solver = DlxSolver(columns, to_sparse(rows), engine='rust', sparse=True)
+    assert sorted(solver) == sorted(DlxSolver(columns, rows))
+    solver.restart(excluded_columns=[column])
+    assert sorted(solver) == sorted(DlxSolver(columns, rows, excluded_columns=[column]))
+    assert [sorted(s) for s in DlxSolver(COLUMNS, ROWS, [3], engine='rust')] == [[0, 3, 4]]
+    with pytest.raises(ValueError, match='Clue 3 conflicts with clue 1'):
+        next(DlxSolver(COLUMNS, ROWS, clues=[1, 3], engine='rust'))
+    with pytest.raises(ValueError):
+        DlxSolver(COLUMNS, ROWS, engine='rust', constraint=MaxRows(2))
+    with pytest.raises(ValueError):
+        DlxSolver(COLUMNS, ROWS, engine='rust').limit(nodes=10)
+    with pytest.raises(ValueError):
+        DlxSolver(COLUMNS, ROWS, engine='rust').branching()
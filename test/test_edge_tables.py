@@ -0,0 +1,120 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).parent.parent / 'src'
+
+sys.path.append(str(SRC))
+
+from edge_tables import (
+    ORIENTATIONS,
+    count_cubits,
+    distinct_orientations,
+    edge_mask,
+    edge_positions,
+    flip,
+    orient,
+    oriented_edge,
+    rotate,
+    side_kind,
+    sides_fit,
+    sides_pair_up,
+    symmetry_class,
+    symmetry_group,
+    to_mask,
+)
+from pads import PadsDublin as Pads, PadsSkatoy
+from kata_helpers import get_edge
+
+
+@pytest.mark.parametrize('pad', Pads)
+@pytest.mark.parametrize('index', range(1, 7))
+def test_oriented_edge(pad, index):
+    for orientation in ORIENTATIONS:
+        edge = oriented_edge(pad, index, orientation)
+        assert edge == get_edge(pad, index, orientation)
+        assert edge_mask(pad, index, orientation) == sum(v << i for i, v in enumerate(edge))
+        assert edge_positions(pad, index, orientation) == tuple(i for i, v in enumerate(edge) if v)
+    assert oriented_edge(pad, index) == pad[index]
+
+
+@pytest.mark.parametrize('pad', Pads)
+@pytest.mark.parametrize('index', range(1, 7))
+def test_distinct_orientations(pad, index):
+    orientations = distinct_orientations(pad, index)
+    assert orientations[0] == 'R0'
+    edges = {tuple(oriented_edge(pad, index, orientation)) for orientation in ORIENTATIONS}
+    assert len(orientations) == len(edges)
+    assert {tuple(oriented_edge(pad, index, orientation)) for orientation in orientations} == edges
+
+
+@pytest.mark.parametrize('pad', [*Pads, *PadsSkatoy])
+@pytest.mark.parametrize('index', range(1, 7))
+def test_symmetry_group(pad, index):
+    group = symmetry_group(pad, index)
+    assert group[0] == 'R0'
+    assert all(edge_mask(pad, index, orientation) == edge_mask(pad, index) for orientation in group)
+    assert len(group) * len(distinct_orientations(pad, index)) == len(ORIENTATIONS)
+
+
+def test_symmetry_class():
+    assert symmetry_class(Pads.BLUE, 1) == 'C1'
+    assert symmetry_class(Pads.BLUE, 4) == 'D1'
+    assert symmetry_class(Pads.GREEN, 2) == 'D4'
+    assert symmetry_class(PadsSkatoy.BLUE, 2) == 'D2'
+
+
+def test_bad_piece():
+    with pytest.raises(IndexError):
+        edge_mask(Pads.BLUE, 0)
+    with pytest.raises(KeyError):
+        edge_mask(Pads.BLUE, 1, 'X0')
+
+
+@pytest.mark.parametrize('mask', [0, 0xFFFF, 0b1, 0b1000000000000001, 0x1234, 0xBEEF])
+def test_rotate_and_flip(mask):
+    assert rotate(mask, 4) == mask
+    assert rotate(rotate(mask, 1), 3) == mask
+    assert flip(flip(mask)) == mask
+    assert (mask & 1) == (flip(mask) & 1)
+    assert mask.bit_count() == rotate(mask).bit_count() == flip(mask).bit_count()
+    # Flipping then turning one way is turning the other way then flipping.
+    assert rotate(flip(mask), 1) == flip(rotate(mask, -1))
+    edge = [(mask >> i) & 1 for i in range(16)]
+    for orientation, (direction, offset) in ORIENTATIONS.items():
+        assert orient(mask, orientation) == to_mask([edge[(offset + direction * i) % 16] for i in range(16)])
+
+
+def test_count_cubits():
+    assert count_cubits(0xFFFF) == (4, 4, 8)
+    assert count_cubits(0b10111) == (2, 1, 1)
+
+
+def test_sides_fit():
+    # Side 1 of a has a cubit at its first corner and its first two inner places; side 3 of b runs the other way.
+    a = 0b00111 << 4
+    b = 0b00010 << 12
+    assert sides_fit(a, 1, b, 3)
+    assert not sides_fit(a, 1, a, 1)  # both fill the same inner places
+    assert not sides_fit(a, 1, 0, 0)  # nobody fills the last inner place
+    assert sides_fit(0b01110, 0, 0, 2)
+
+
+def test_side_kind():
+    assert side_kind(0b00111) == side_kind(0b11100) == 0b00111
+    assert side_kind(0b10001) == 0b10001
+
+
+def counts(kinds: dict[int, int]) -> list[int]:
+    return [kinds.get(kind, 0) for kind in range(32)]
+
+
+def test_sides_pair_up():
+    assert sides_pair_up(counts({}))
+    assert sides_pair_up(counts({0b00000: 2, 0b01110: 2}))
+    assert not sides_pair_up(counts({0b00000: 2, 0b01110: 1}))
+    # Two full sides with cubits at both corners can only be joined to sides without corner cubits.
+    assert sides_pair_up(counts({0b11111: 2, 0b00000: 2}))
+    assert not sides_pair_up(counts({0b11111: 2, 0b00000: 1, 0b00001: 1}))
+    assert sides_pair_up(counts({0b01111: 2, 0b00001: 2}))  # the corner cubits go at opposite ends
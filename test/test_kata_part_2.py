@@ -6,7 +6,7 @@ from kata_part_2_solution import get_covered_shape_slots, get_edge, Piece
 from pads import PadsDublin as Pads
 from shapes import Shapes
 from kata_part_1_solution import get_shape_slots
-from test_kata_part_3 import shape_shuffle
+from kata_helpers import shape_shuffle
 
 COLORS = ['BLUE', 'GREEN', 'PINK', 'PURPLE', 'RED', 'YELLOW']
 ORIENTATIONS = ['R0', 'R1', 'R2', 'R3', 'F0', 'F1', 'F2', 'F3']
@@ -1,61 +1,34 @@
+import asyncio
 import sys
-from enum import Enum
-from itertools import chain
+from itertools import combinations
 from pathlib import Path
-from random import shuffle, randrange, sample
+from random import sample
 
 import pytest
 
 SRC = str(Path(__file__).parent.parent / 'src')
 sys.path.append(SRC)
 
-from kata_part_3_solution import solve, HintSpec, solve_one
+from kata_part_3_solution import (
+    solve,
+    solve_one,
+    solve_async,
+    solve_batch,
+    solve_one_async,
+    count_solutions,
+    filter_pieces,
+    get_cubits,
+    piece_subsets,
+    NoSolution,
+    Problem,
+    _luby,
+)
+from dlx_solver import SearchLimitReached
+from time_guard import WorkerPool
 from preloaded import check_solution
 from shapes import Shapes
-from pads import PadsDublin as Pads, PadsBase, PadsSkatoy
-
-
-class Orientations(Enum):
-    R0 = (1, 0)
-    R1 = (1, 12)
-    R2 = (1, 8)
-    R3 = (1, 4)
-    F0 = (-1, 4)
-    F1 = (-1, 8)
-    F2 = (-1, 12)
-    F3 = (-1, 0)
-
-    def __init__(self, direction: int, offset: int):
-        self._direction = direction
-        self._offset = offset
-        self._indexes = [(offset + direction * i) % 16 for i in range(16)]
-
-    def apply(self, edge: list[int]):
-        return (edge[i] for i in self._indexes)
-
-    def rotate(self, k):
-        sign = self._direction
-        return Orientations((sign, (self._offset - sign * k * 4) % 16))
-
-
-def get_edge(pad_: PadsBase, index_: int, orientation_str_: str) -> list[int]:
-    """Returns the edge of the piece with given index of given pad"""
-    c = str(index_)
-    lines = pad_.value.splitlines()
-    row_min = next(i for i, row in enumerate(lines) if c in row)
-    row_max = row_min + 4
-    col_min = 100
-    for i, row in enumerate(lines[row_min: row_max + 1], start=row_min):
-        col_start = next(j for j, v in enumerate(row) if v == c)
-        col_min = min(col_min, col_start)
-    col_max = col_min + 4
-    edge = list(chain(
-        (int(lines[row_min][i] == c) for i in range(col_min, col_max)),
-        (int(lines[i][col_max] == c) for i in range(row_min, row_max)),
-        (int(lines[row_max][i] == c) for i in range(col_max, col_min, -1)),
-        (int(lines[i][col_min] == c) for i in range(row_max, row_min, -1)),
-    ))
-    return list(Orientations[orientation_str_].apply(edge))
+from pads import PadsDublin as Pads, PadsSkatoy
+from kata_helpers import get_edge, shape_shuffle
 
 
 def print_edge(edge):
@@ -90,31 +63,6 @@ def print_solution(solution):
         print()
 
 
-def shape_shuffle(
-    shape: list[tuple[int, int, int, int]],
-    hints: list[tuple[int, str, int, str]] | None = None,
-) -> tuple[list[tuple[int, int, int, int]], list[HintSpec]]:
-    hints = hints or []
-    num_tiles = len(shape)
-    permutation = list(range(num_tiles))
-    shuffle(permutation)
-    res = {}
-    for tile, neighbors in enumerate(shape):
-        res[permutation[tile]] = tuple(permutation[j] for j in neighbors)
-    hints_map = {permutation[tile]: (color, index, orientation_str)
-                 for tile, color, index, orientation_str in hints}
-    for tile, neighbors in res.items():
-        k = randrange(4)
-        if k > 0:
-            res[tile] = tuple(neighbors[(j + k) % 4] for j in range(4))
-            if tile in hints_map:
-                color, index, orientation_str = hints_map[tile]
-                orientation = Orientations[orientation_str].rotate(-k)
-                hints_map[tile] = (color, index, orientation.name)
-    # noinspection PyTypeChecker
-    return [res[i] for i in range(num_tiles)], [(i, *rest) for i, rest in hints_map.items()]
-
-
 @pytest.mark.parametrize('pieces', [
     *([(pad, i) for i in range(1, 7)] for pad in Pads),
 ])
@@ -128,6 +76,184 @@ def test_solution_1x1x1_cube(pieces):
     assert not errors, '\n'.join(errors)
 
 
+@pytest.mark.parametrize('ordered', [False, True])
+def test_solution_1x1x1_cube_parallel(ordered):
+    shape, _ = shape_shuffle(Shapes.CUBE_1x1x1.value)
+    pieces = [(pad, i) for pad in (Pads.BLUE, Pads.YELLOW) for i in range(1, 7)]
+    solutions = list(solve(shape, pieces, workers=2, ordered=ordered))
+    assert solutions
+    for solution in solutions:
+        errors = check_solution(shape, set(pieces), [], solution)
+        assert not errors, '\n'.join(errors)
+
+
+@pytest.mark.parametrize('depth', [0, 1, 4])
+def test_solution_1x1x1_cube_parallel_depth(depth):
+    shape, _ = shape_shuffle(Shapes.CUBE_1x1x1.value)
+    pieces = [(pad, i) for pad in (Pads.BLUE, Pads.YELLOW) for i in range(1, 7)]
+    assert sorted(solve(shape, pieces, workers=2, depth=depth)) == sorted(solve(shape, pieces))
+
+
+@pytest.mark.parametrize('symmetry', [None, 'canonical'])
+def test_solution_1x1x1_cube_parallel_first(symmetry):
+    shape, _ = shape_shuffle(Shapes.CUBE_1x1x1.value)
+    pieces = [(pad, i) for pad in (Pads.BLUE, Pads.YELLOW) for i in range(1, 7)]
+    solutions = list(solve(shape, pieces, workers=2, symmetry=symmetry, first=True))
+    assert len(solutions) == 1
+    errors = check_solution(shape, set(pieces), [], solutions[0])
+    assert not errors, '\n'.join(errors)
+
+
+def test_count_solutions():
+    shape, _ = shape_shuffle(Shapes.CUBE_1x1x1.value)
+    pieces = [(pad, i) for pad in (Pads.BLUE, Pads.YELLOW) for i in range(1, 7)]
+    num_solutions = len(list(solve(shape, pieces)))
+    level_counts = []
+    assert count_solutions(shape, pieces, level_counts=level_counts) == num_solutions
+    assert len(level_counts) == len(shape)
+    assert count_solutions(shape, pieces, single_pass=True) == num_solutions
+
+
+def test_search():
+    shape, _ = shape_shuffle(Shapes.CUBE_1x1x1.value)
+    pieces = [(pad, i) for pad in list(Pads)[:3] for i in range(1, 7)]
+    problem = Problem(shape, pieces, [], [])
+    subsets = list(piece_subsets(shape, pieces))
+    expected = [next(problem.solve(subset=subset), None) for subset in subsets]
+    assert [problem.search(subset) for subset in subsets] == expected
+    # A search cut short leaves the problem as it was.
+    subset = subsets[expected.index(None)]
+    with pytest.raises(SearchLimitReached):
+        problem.search(subset, 2)
+    assert next(problem.solve(subset=subset), None) is None
+    assert [problem.search(subset, 10 ** 6) for subset in subsets] == expected
+
+
+@pytest.mark.parametrize('hints, message', [
+    ([(6, Pads.BLUE, 4, 'R2')], r"Hint \(6, .*\) is on no tile"),
+    ([(0, Pads.BLUE, 4, 'R2'), (0, Pads.BLUE, 5, 'R0')], r"Hints \(0, .*\) and \(0, .*\) are on the same tile"),
+    ([(0, Pads.BLUE, 4, 'R2'), (1, Pads.BLUE, 4, 'R0')], "place the same piece"),
+    ([(0, Pads.BLUE, 4, 'R4')], "has no orientation 'R4'"),
+    ([(0, Pads.BLUE, 4, 'R2'), (1, Pads.BLUE, 3, 'R0')], "cover the same slot"),
+])
+def test_conflicting_hints(hints, message):
+    pieces = [(pad, i) for pad in Pads for i in range(1, 7)]
+    with pytest.raises(ValueError, match=message):
+        Problem(Shapes.CUBE_1x1x1.value, pieces, hints, [])
+
+
+def test_shuffle():
+    shape, _ = shape_shuffle(Shapes.CUBE_1x1x1.value)
+    pieces = [(pad, i) for pad in list(Pads)[:3] for i in range(1, 7)]
+    hints = [(0, Pads.BLUE, 4, 'R2')]
+    problem = Problem(shape, pieces, hints, [])
+    subsets = list(piece_subsets(shape, pieces, hints))
+    expected = [sorted(map(tuple, problem.solve(subset=subset))) for subset in subsets]
+    problem.shuffle()
+    assert [sorted(map(tuple, problem.solve(subset=subset))) for subset in subsets] == expected
+    for subset, solutions in zip(subsets, expected):
+        solution = problem.search(subset)
+        assert tuple(solution) in solutions if solutions else solution is None
+
+
+def test_solve_one():
+    assert [_luby(i) for i in range(1, 16)] == [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8]
+    shape, _ = shape_shuffle(Shapes.CUBE_1x1x1.value)
+    pieces = [(pad, i) for pad in Pads for i in range(1, 7)]
+    errors = check_solution(shape, set(pieces), [], solve_one(shape, pieces))
+    assert not errors, '\n'.join(errors)
+    with pytest.raises(TimeoutError):
+        solve_one(Shapes.PRISM_3x3x1.value, pieces, timeout=0)
+    with pytest.raises(NoSolution):
+        solve_one(shape, pieces[:5])  # too few pieces
+
+
+def test_solve_batch():
+    pieces = [(pad, i) for pad in Pads for i in range(1, 7)]
+    hints = [(0, Pads.BLUE, 4, 'R2')]
+    jobs = [
+        (Shapes.CUBE_1x1x1.value, pieces),
+        (Shapes.PRISM_1x1x2.value, pieces, hints),
+        (Shapes.CUBE_1x1x1.value, pieces[:5]),  # too few pieces
+        (Shapes.CUBE_1x1x1.value, pieces, hints, []),
+        (Shapes.CUBE_1x1x1.value, pieces, hints + [(1, Pads.BLUE, 4, 'R0')]),  # conflicting hints
+        (Shapes.CUBE_1x1x1.value,),  # no pieces
+    ]
+    results = sorted(solve_batch(jobs, workers=2, chunk_size=2))
+    assert [(index, status) for index, status, *_ in results] == [
+        (0, 'solved'),
+        (1, 'solved'),
+        (2, 'unsolvable'),
+        (3, 'solved'),
+        (4, 'error'),
+        (5, 'error'),
+    ]
+    assert results[4].error.startswith('ValueError: Hints') and results[5].error.startswith('ValueError')
+    for (shape, pieces_, *rest), (_, _, solution, _) in zip(jobs[:4], results):
+        if solution is not None:
+            errors = check_solution(shape, set(pieces_), rest[0] if rest else [], solution)
+            assert not errors, '\n'.join(errors)
+    assert list(solve_batch([(Shapes.PRISM_3x3x1.value, pieces)], timeout=0)) == [(0, 'timeout', None, None)]
+
+
+def test_solve_async():
+    shape, _ = shape_shuffle(Shapes.CUBE_1x1x1.value)
+    pieces = [(pad, i) for pad in list(Pads)[:3] for i in range(1, 7)]
+    all_pieces = [(pad, i) for pad in Pads for i in range(1, 7)]
+
+    async def main(pool: WorkerPool) -> None:
+        solutions = [solution async for solution in solve_async(shape, pieces, pool=pool)]
+        assert sorted(map(sorted, solutions)) == sorted(map(sorted, solve(shape, pieces)))
+        # More requests than workers wait their turn.
+        for solution in await asyncio.gather(*(solve_one_async(shape, all_pieces, pool=pool) for _ in range(3))):
+            errors = check_solution(shape, set(all_pieces), [], solution)
+            assert not errors, '\n'.join(errors)
+        async def count_all() -> int:  # takes far longer than the test
+            return len([solution async for solution in solve_async(Shapes.CUBE_2x2x2.value, all_pieces, pool=pool)])
+
+        task = asyncio.create_task(count_all())
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert await solve_one_async(shape, all_pieces, pool=pool)
+        with pytest.raises(NoSolution):
+            await solve_one_async(shape, all_pieces[:5], pool=pool)
+
+    with WorkerPool(2) as pool:
+        asyncio.run(main(pool))
+
+
+@pytest.mark.parametrize('hints', [[], [(0, Pads.BLUE, 4, 'R2')]])
+def test_filter_pieces(hints):
+    # Of the subsets of all the pieces but the hinted ones, those with as many cubits of each kind as the cube needs.
+    shape = Shapes.CUBE_1x1x1.value
+    pieces = [(pad, i) for pad in list(Pads)[:3] for i in range(1, 7)]
+    hint_pieces = [(pad, index) for _, pad, index, _ in hints]
+    expected = {
+        frozenset(subset)
+        for subset in combinations([piece for piece in pieces if piece not in hint_pieces], 6 - len(hints))
+        if tuple(map(sum, zip(*(get_cubits(*piece) for piece in [*subset, *hint_pieces])))) == (8, 12, 24)
+    }
+    stats = {}
+    subsets = [frozenset(subset) for subset in filter_pieces(shape, pieces, hints, stats=stats)]
+    assert len(subsets) == len(set(subsets)) and set(subsets) <= expected
+    assert stats == {'rejected': len(expected) - len(subsets), 'passed': len(subsets)}
+    # A second call, on the lattices cached by the first, yields the same subsets.
+    assert [frozenset(subset) for subset in filter_pieces(shape, pieces, hints)] == subsets
+    # The subsets rejected for their sides have no solutions.
+    assert count_solutions(shape, pieces, hints) == count_solutions(shape, pieces, hints, single_pass=True)
+
+
+@pytest.mark.parametrize('shape', [Shapes.CUBE_1x1x1, Shapes.T_SHAPE])
+def test_solution_single_pass(shape: Shapes):
+    shape_, _ = shape_shuffle(shape.value)
+    pieces = [(pad, i) for pad in Pads for i in range(1, 7)]
+    solution = next(solve(shape_, pieces, single_pass=True))
+    errors = check_solution(shape_, set(pieces), [], solution)
+    assert not errors, '\n'.join(errors)
+
+
 def test_solution_two_1x1x1_cubes():
     _shape = Shapes.TWO_CUBE_1x1x1.value
     hints = None
@@ -0,0 +1,74 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).parent.parent / 'src'
+
+sys.path.append(str(SRC))
+
+from kata_part_3_solution import get_shape_slots, solve, solve_unique
+from pads import PadsDublin as Pads
+from preloaded import check_solution
+from shape_symmetry import automorphisms, solution_key
+from shapes import Shapes
+from kata_helpers import shape_shuffle
+
+
+@pytest.mark.parametrize('shape, order', [
+    (Shapes.CUBE_1x1x1, 48),
+    (Shapes.CUBE_2x2x2, 48),
+    (Shapes.PRISM_1x1x3, 16),
+    (Shapes.T_SHAPE, 4),
+    (Shapes.CUBE_2x2x2_WITH_CUBE_1x1x1_OUTGROWTH, 2),
+    (Shapes.TWO_CUBE_1x1x1, 48),  # only those of the first cube
+])
+def test_automorphisms(shape, order):
+    shape_, _ = shape_shuffle(shape.value)
+    group = automorphisms(shape_, get_shape_slots(shape_))
+    assert len(group) == order
+    assert group[0].tiles == tuple(range(len(shape_)))
+    assert set(group[0].offsets) == {0} and set(group[0].directions) == {1}
+
+
+def test_automorphisms_keep_tack_stitches():
+    # Stitching two corners of the cube together only leaves the automorphisms that keep the pair.
+    shape = Shapes.CUBE_1x1x1.value
+    tack_stitches = [(0 * 16 + 0, 4 * 16 + 8)]
+    slots = get_shape_slots(shape, tack_stitches)
+    group = automorphisms(shape, slots)
+    assert 1 < len(group) < 48
+    stitched = {slots[0]}
+    assert all({slots[16 * t + p] for t, p in [g.position(0, 0)]} == stitched for g in group)
+
+
+@pytest.mark.parametrize('shape, pads, hints', [
+    (Shapes.CUBE_1x1x1, (Pads.BLUE, Pads.YELLOW), []),
+    (Shapes.PRISM_1x1x2, (Pads.BLUE, Pads.YELLOW), []),
+    (Shapes.CUBE_1x1x1, (Pads.BLUE, Pads.YELLOW), [(0, Pads.BLUE, 4, 'R2')]),
+])
+def test_solve_with_symmetry(shape, pads, hints):
+    shape_, hints = shape_shuffle(shape.value, hints)
+    pieces = [(pad, i) for pad in pads for i in range(1, 7)]
+    solutions = {tuple(s) for s in solve(shape_, pieces, hints=hints)}
+    canonical = list(solve(shape_, pieces, hints=hints, symmetry='canonical'))
+    expanded = list(solve(shape_, pieces, hints=hints, symmetry='expand'))
+    assert len(canonical) < len(solutions)
+    assert len(expanded) == len(solutions) and {tuple(s) for s in expanded} == solutions
+    for solution in expanded:
+        errors = check_solution(shape_, set(pieces), hints, solution)
+        assert not errors, '\n'.join(errors)
+
+
+@pytest.mark.parametrize('shape', [Shapes.CUBE_1x1x1, Shapes.PRISM_1x1x2])
+def test_solve_unique(shape):
+    shape_, _ = shape_shuffle(shape.value)
+    group = automorphisms(shape_, get_shape_slots(shape_))
+    pieces = [(pad, i) for pad in (Pads.BLUE, Pads.YELLOW) for i in range(1, 7)]
+    solutions = list(solve(shape_, pieces))
+    keys = {solution_key(group, solution) for solution in solutions}
+    assert all(solution_key(group, g.solution(solutions[0])) == solution_key(group, solutions[0]) for g in group)
+    unique = list(solve_unique(shape_, pieces))
+    assert len(unique) == len(keys) <= len(list(solve(shape_, pieces, symmetry='canonical')))
+    assert {solution_key(group, solution) for solution in unique} == keys
+    assert len(list(solve_unique(shape_, pieces, single_pass=True, digest_size=8))) == len(keys)
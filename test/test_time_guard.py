@@ -1,7 +1,10 @@
 import asyncio
+import os
 from time import perf_counter, sleep
 
-from time_guard import time_guard
+import pytest
+
+from time_guard import WorkerPool, time_guard
 
 
 def test_time_guard():
@@ -20,3 +23,76 @@ def test_time_guard():
             except asyncio.TimeoutError:
                 print(f"❌{fn.__name__} timed out!")
             print(f"Time = {int((perf_counter() - start) * 1000)} ms")
+
+
+def _pid_after(seconds: float) -> int:
+    sleep(seconds)
+    return os.getpid()
+
+
+def _fail() -> None:
+    raise ValueError("failed")
+
+
+def test_worker_pool():
+    with WorkerPool(1) as pool:
+        guarded = time_guard(1, pool)(_pid_after)
+        pid = guarded(0)
+        assert pid != os.getpid()
+        assert guarded(0) == pid  # the same warm worker
+        with pytest.raises(TimeoutError):
+            guarded(3)
+        new_pid = guarded(0)
+        assert new_pid not in (pid, os.getpid())  # a fresh worker in place of the one killed
+        with pytest.raises(ValueError):
+            time_guard(1, pool)(_fail)()
+        assert guarded(0) == new_pid
+
+
+def _count_up(n: int):
+    yield from range(n)
+    raise ValueError("done")
+
+
+def test_worker_pool_async():
+    async def main(pool: WorkerPool) -> None:
+        pid = await pool.run_async(_pid_after, 0)
+        with pytest.raises(ValueError):
+            async for i in pool.stream_async(_count_up, 3):
+                assert i < 3
+        assert await pool.run_async(_pid_after, 0) == pid
+        stream = pool.stream_async(_count_up, 10 ** 9)
+        assert await anext(stream) == 0
+        await stream.aclose()  # kills the worker halfway
+        assert await pool.run_async(_pid_after, 0) != pid
+
+    with WorkerPool(1) as pool:
+        asyncio.run(main(pool))
+
+
+def test_worker_pool_async_on_two_loops():
+    async def main(pool: WorkerPool) -> list[int]:
+        # More coroutines than workers, so that they wait on the pool
+        return await asyncio.gather(*(pool.run_async(_pid_after, 0.1) for _ in range(3)))
+
+    with WorkerPool(1) as pool:
+        pids = asyncio.run(main(pool))
+        assert asyncio.run(main(pool)) == pids
+
+
+_state = 'imported'
+
+
+def _get_state() -> str:
+    return _state
+
+
+def test_worker_pool_does_not_fork():
+    global _state
+    _state = 'changed after import'
+    try:
+        with WorkerPool(1) as pool:
+            # A worker imports this module afresh instead of copying the memory of the caller.
+            assert pool.run(5, _get_state) == 'imported'
+    finally:
+        _state = 'imported'